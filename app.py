@@ -19,17 +19,37 @@ import json
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.base import BaseTrigger
 from apscheduler.jobstores.memory import MemoryJobStore
 import shutil
 import time
+import threading
+import gzip
+import heapq
+import bisect
+import base64
+import hashlib
+import mimetypes
+from urllib.parse import quote as url_quote
+import xml.etree.ElementTree as ET
+import queue
+import re
+import mmap
+import struct
+import fcntl
+import select
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 import zipfile
 from io import BytesIO
 from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
+import flask_migrate
 from werkzeug.security import generate_password_hash, check_password_hash
 import sqlalchemy
 import flask_sqlalchemy
-from functools import wraps
+from functools import wraps, partial
 from flask import redirect, url_for, flash
 
 # Fix SQLAlchemy compatibility issues if needed
@@ -52,8 +72,70 @@ app.secret_key = os.environ.get('SECRET_KEY')
 if not app.secret_key:
     raise RuntimeError('SECRET_KEY environment variable is not set. Refusing to start in production without a secure key.')
 app.config['RECORDINGS_FOLDER'] = RECORDINGS_FOLDER
+# Number of captures that can run at the same time, independent of the scheduler's executor
+app.config['MAX_CONCURRENT_RECORDINGS'] = int(os.environ.get('MAX_CONCURRENT_RECORDINGS', 64))
+# Number of recent ffmpeg log lines kept in memory per capture (the full log goes to LOGS_PATH/recordings)
+app.config['RECORDING_LOG_LINES'] = int(os.environ.get('RECORDING_LOG_LINES', 200))
+# Length of the segments a capture is written in; a resume only ever appends new segments
+app.config['RECORDING_SEGMENT_SECONDS'] = int(os.environ.get('RECORDING_SEGMENT_SECONDS', 300))
+# Pull each live station once and fan the stream out to every capture of that station
+app.config['SHARE_STATION_STREAMS'] = os.environ.get('SHARE_STATION_STREAMS', 'True').lower() == 'true'
+# Seconds of each station stream kept in memory, so a capture can take its audio from a past instant
+app.config['STATION_BUFFER_SECONDS'] = int(os.environ.get('STATION_BUFFER_SECONDS', 30))
+# Captures are dispatched this many seconds early and connect before their start time
+app.config['CAPTURE_WARMUP_SECONDS'] = int(os.environ.get('CAPTURE_WARMUP_SECONDS', 15))
+# Seconds a shared station stream may deliver nothing before its captures are failed
+app.config['STATION_INGEST_IDLE_TIMEOUT'] = int(os.environ.get('STATION_INGEST_IDLE_TIMEOUT', 60))
+# Seconds a capture may go without new audio before the supervisor kills and restarts it
+app.config['CAPTURE_STALL_SECONDS'] = int(os.environ.get('CAPTURE_STALL_SECONDS', 30))
+# Captures writing fewer bytes per second than this are restarted too; 0 disables the check
+app.config['CAPTURE_MIN_BYTES_PER_SECOND'] = int(os.environ.get('CAPTURE_MIN_BYTES_PER_SECOND', 0))
+# Seconds of decoded silence after which a capture is restarted; 0 disables silence detection
+app.config['CAPTURE_SILENCE_SECONDS'] = int(os.environ.get('CAPTURE_SILENCE_SECONDS', 0))
+app.config['CAPTURE_SILENCE_NOISE_DB'] = int(os.environ.get('CAPTURE_SILENCE_NOISE_DB', -50))
+# Restarts of an unhealthy capture before it switches to the station's fallback URL
+app.config['CAPTURE_FAILOVER_AFTER'] = int(os.environ.get('CAPTURE_FAILOVER_AFTER', 2))
+# Space recordings may use; 0 means the capacity of the filesystem holding RECORDINGS_FOLDER
+app.config['STORAGE_QUOTA_MB'] = int(os.environ.get('STORAGE_QUOTA_MB', 0))
+# Above the high watermark (percent used) old podcast episodes are evicted down to the low watermark
+app.config['STORAGE_HIGH_WATERMARK'] = float(os.environ.get('STORAGE_HIGH_WATERMARK', 90))
+app.config['STORAGE_LOW_WATERMARK'] = float(os.environ.get('STORAGE_LOW_WATERMARK', 80))
+# How often the file index picks up changes made to RECORDINGS_FOLDER outside the app
+app.config['FILE_INDEX_RESCAN_SECONDS'] = int(os.environ.get('FILE_INDEX_RESCAN_SECONDS', 300))
+# Bitrate assumed for stations without completed recordings when checking a capture will fit
+app.config['STORAGE_DEFAULT_BITRATE_KBPS'] = int(os.environ.get('STORAGE_DEFAULT_BITRATE_KBPS', 192))
+# Write captures that are saved to local storage straight into their local storage folder
+app.config['CAPTURE_TO_LOCAL_STORAGE'] = os.environ.get('CAPTURE_TO_LOCAL_STORAGE', 'False').lower() == 'true'
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///radio_recorder.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Serve recordings through the front-end server instead of Python: X-Sendfile (Apache, lighttpd)
+# or nginx's X-Accel-Redirect, with the internal location that maps to RECORDINGS_FOLDER
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', 'False').lower() == 'true'
+app.config['X_ACCEL_REDIRECT_PREFIX'] = os.environ.get('X_ACCEL_REDIRECT_PREFIX', '')
+# Cache lifetime for recording files; they don't change once completed
+app.config['RECORDING_FILE_MAX_AGE'] = int(os.environ.get('RECORDING_FILE_MAX_AGE', 3600))
+# Keep a gzipped copy of each rendered podcast feed for clients that accept it
+app.config['PODCAST_FEED_GZIP'] = os.environ.get('PODCAST_FEED_GZIP', 'True').lower() == 'true'
+# Episodes per podcast feed page; older episodes are reachable through RFC 5005 "next" links
+app.config['PODCAST_FEED_PAGE_SIZE'] = int(os.environ.get('PODCAST_FEED_PAGE_SIZE', 100))
+# Bearer token Prometheus must send to read /metrics; empty leaves /metrics open like /health
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN', '')
+# Days the timeline events of recordings are kept
+app.config['RECORDING_TRACE_DAYS'] = int(os.environ.get('RECORDING_TRACE_DAYS', 90))
+# Rows per page on the recordings page and default page size of /api/recordings
+app.config['RECORDINGS_PAGE_SIZE'] = int(os.environ.get('RECORDINGS_PAGE_SIZE', 50))
+# Worker threads per post-processing stage (local copy, Nextcloud, retention, Pushover)
+app.config['POST_PROCESSING_WORKERS'] = int(os.environ.get('POST_PROCESSING_WORKERS', 2))
+# Attempts per post-processing stage before it is marked failed; retries back off exponentially
+app.config['POST_PROCESSING_MAX_ATTEMPTS'] = int(os.environ.get('POST_PROCESSING_MAX_ATTEMPTS', 5))
+# Recording notifications to the same user within this many seconds are sent as one Pushover message
+app.config['PUSHOVER_COALESCE_SECONDS'] = int(os.environ.get('PUSHOVER_COALESCE_SECONDS', 10))
+# Files larger than one chunk are uploaded to Nextcloud in chunks (Nextcloud needs at least 5 MB)
+app.config['NEXTCLOUD_CHUNK_SIZE'] = int(os.environ.get('NEXTCLOUD_CHUNK_SIZE', 10 * 1024 * 1024))
+# Chunks of one upload sent in parallel
+app.config['NEXTCLOUD_UPLOAD_THREADS'] = int(os.environ.get('NEXTCLOUD_UPLOAD_THREADS', 4))
+# Seconds a Nextcloud folder is remembered to exist, saving the lookups on the next upload
+app.config['NEXTCLOUD_DIR_CACHE_TTL'] = int(os.environ.get('NEXTCLOUD_DIR_CACHE_TTL', 3600))
 
 if not os.environ.get('FLASK_DEBUG', 'False').lower() == 'true':
     # Set up logging for production
@@ -77,8 +159,8 @@ if not os.environ.get('FLASK_DEBUG', 'False').lower() == 'true':
 # Initialize database
 db = SQLAlchemy(app)
 
-# Add this import with your other SQLAlchemy imports
-from sqlalchemy import text
+# Versioned schema migrations (see migrations/)
+migrate = Migrate(app, db, directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations'))
 
 # Update your scheduler to use SQLAlchemy for job storage
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
@@ -127,9 +209,35 @@ class Station(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     url = db.Column(db.String(255), nullable=False)
+    fallback_url = db.Column(db.String(255))  # Alternate stream used when the main one goes bad
     # Add any other fields specific to a station
 
+class RecordingStatus:
+    """Lifecycle states of a recording; always stored in lower case."""
+    SCHEDULED = 'scheduled'
+    IN_PROGRESS = 'in_progress'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    ALL = (SCHEDULED, IN_PROGRESS, COMPLETED, FAILED)
+
+# Stored as VARCHAR so existing databases need no table rebuild; values are validated on write
+RECORDING_STATUS_TYPE = db.Enum(*RecordingStatus.ALL, name='recording_status', native_enum=False,
+                                create_constraint=False, validate_strings=True, length=20)
+
 class Recording(db.Model):
+    __table_args__ = (
+        # Podcast feeds and retention: episodes of a podcast by status, newest first
+        db.Index('ix_recording_podcast_status_start', 'podcast_uuid', 'status', 'actual_start_time'),
+        # Recordings page: a user's recordings by status and end time
+        db.Index('ix_recording_user_status_end', 'user_id', 'status', 'end_time'),
+        # Recordings page for admins: everyone's recordings by status and end time
+        db.Index('ix_recording_status_end', 'status', 'end_time', 'id'),
+        # Scheduling and the watchdog: recordings by status and start time
+        db.Index('ix_recording_status_start', 'status', 'start_time'),
+        # File index reconciliation: recordings by file
+        db.Index('ix_recording_output_file', 'output_file'),
+    )
+    
     id = db.Column(db.String(36), primary_key=True)
     station_id = db.Column(db.Integer, db.ForeignKey('station.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
@@ -138,13 +246,14 @@ class Recording(db.Model):
     duration_minutes = db.Column(db.Integer, nullable=False)
     duration_seconds = db.Column(db.Integer, nullable=False)
     output_file = db.Column(db.String(255))
-    status = db.Column(db.String(20), default='scheduled')
+    status = db.Column(RECORDING_STATUS_TYPE, default=RecordingStatus.SCHEDULED)
     created_at = db.Column(db.DateTime, default=datetime.now)
     recurring = db.Column(db.String(50))
     recurring_type = db.Column(db.String(20))
     actual_start_time = db.Column(db.DateTime)
     error = db.Column(db.Text)
     file_size = db.Column(db.Integer)
+    actual_duration_seconds = db.Column(db.Float)  # Measured from the audio file
     
     # Podcast related fields
     is_podcast = db.Column(db.Boolean, default=False)
@@ -167,6 +276,9 @@ class Recording(db.Model):
 
     # Retention settings
     max_recordings = db.Column(db.Integer, default=0)  # 0 means keep all recordings
+    max_age_days = db.Column(db.Integer, default=0)  # Delete episodes older than this, 0 means no limit
+    max_total_size_mb = db.Column(db.Integer, default=0)  # Keep the podcast under this size, 0 means no limit
+    feed_max_episodes = db.Column(db.Integer, default=0)  # Latest N episodes in the feed, 0 means all
 
     # Local filesystem integration
     save_to_local = db.Column(db.Boolean, default=False)
@@ -174,6 +286,11 @@ class Recording(db.Model):
     create_folder_structure = db.Column(db.Boolean, default=True)
     local_status = db.Column(db.String(20))  # success, failed, pending
     local_error = db.Column(db.Text)
+    local_copy_method = db.Column(db.String(20))  # in_place, hardlink, reflink, copy_file_range, copy
+
+    # Capture window around the scheduled slot
+    pre_roll_seconds = db.Column(db.Integer, default=0)  # Audio kept from before the scheduled start
+    post_roll_seconds = db.Column(db.Integer, default=0)  # Audio kept past the scheduled end
 
     # Pushover notification
     pushover_enabled = db.Column(db.Boolean, default=False)
@@ -191,11 +308,14 @@ class Recording(db.Model):
             'start_time': self.start_time,
             'duration_minutes': self.duration_minutes,
             'duration_seconds': self.duration_seconds,
+            'pre_roll_seconds': self.pre_roll_seconds or 0,
+            'post_roll_seconds': self.post_roll_seconds or 0,
             'output_file': self.output_file,
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'actual_start_time': self.actual_start_time.isoformat() if self.actual_start_time else None,
-            'file_size': self.file_size
+            'file_size': self.file_size,
+            'actual_duration_seconds': self.actual_duration_seconds
         }
         
         if self.recurring:
@@ -221,11 +341,17 @@ class Recording(db.Model):
                 'enabled': self.save_to_local,
                 'folder': self.local_folder,
                 'create_folder_structure': self.create_folder_structure,
-                'status': self.local_status
+                'status': self.local_status,
+                'copy_method': self.local_copy_method
             }
             
         return result
     
+    @property
+    def capture_seconds(self):
+        """Length of audio one run captures, pre-roll and post-roll included"""
+        return self.duration_seconds + (self.pre_roll_seconds or 0) + (self.post_roll_seconds or 0)
+    
     # Custom property to flag recurring instances
     @property
     def is_recurring_instance(self):
@@ -235,6 +361,71 @@ class Recording(db.Model):
     def is_recurring_instance(self, value):
         self._is_recurring_instance = value
 
+class PostProcessingTask(db.Model):
+    """One post-processing stage (local copy, Nextcloud upload, ...) of a completed recording"""
+    __table_args__ = (
+        # Workers pick the next due task of their stage
+        db.Index('ix_post_processing_task_stage_status_due', 'stage', 'status', 'next_attempt_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    recording_id = db.Column(db.String(36), db.ForeignKey('recording.id'), nullable=False, index=True)
+    stage = db.Column(db.String(20), nullable=False)  # local_copy, nextcloud, retention, pushover
+    file_path = db.Column(db.String(255))  # The run's file; a recurring recording moves on to a new one
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.now)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    duration_seconds = db.Column(db.Float)  # Time taken by the last attempt
+    last_error = db.Column(db.Text)
+    
+    recording = db.relationship('Recording', backref=db.backref(
+        'post_processing_tasks', cascade='all, delete-orphan', order_by='PostProcessingTask.id'))
+    
+    def to_dict(self):
+        return {
+            'stage': self.stage,
+            'file_path': self.file_path,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'duration_seconds': self.duration_seconds,
+            'last_error': self.last_error
+        }
+
+class RecordingEvent(db.Model):
+    """One step in the life of a recording (scheduled, dispatched, ffmpeg spawned, ...), for its timeline"""
+    __table_args__ = (
+        db.Index('ix_recording_event_recording_at', 'recording_id', 'at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    recording_id = db.Column(db.String(36), db.ForeignKey('recording.id'), nullable=False)
+    event = db.Column(db.String(30), nullable=False)
+    at = db.Column(db.DateTime, nullable=False)
+    duration_seconds = db.Column(db.Float)  # For spans: ffmpeg runs, post-processing stages, ...
+    detail = db.Column(db.String(255))
+    
+    recording = db.relationship('Recording', backref=db.backref('events', cascade='all, delete-orphan', lazy='dynamic'))
+
+class IndexedFile(db.Model):
+    """An audio file in RECORDINGS_FOLDER, as last seen by the file index"""
+    path = db.Column(db.String(1024), primary_key=True)
+    directory = db.Column(db.String(1024), nullable=False, index=True)
+    size = db.Column(db.BigInteger)
+    mtime = db.Column(db.Float)
+    recording_id = db.Column(db.String(36), index=True)  # None for orphaned files
+
+class IndexedDirectory(db.Model):
+    """A directory of RECORDINGS_FOLDER and its mtime when it was last listed"""
+    path = db.Column(db.String(1024), primary_key=True)
+    parent = db.Column(db.String(1024), index=True)
+    mtime_ns = db.Column(db.BigInteger)
+
 # Initialize login manager
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -253,8 +444,1014 @@ def password_change_required(func):
         return func(*args, **kwargs)
     return decorated_view
 
-def record_audio(recording_id, station_url, output_file, duration_seconds):
-    """Record audio from a stream URL to a file for a specified duration with retry capability."""
+class Metric:
+    """A metric family for /metrics: one value per combination of label values.
+
+    Values are either updated in place or, when a callback is given, read
+    from it at scrape time; the callback returns a number or a dict of label
+    value tuples to numbers.
+    """
+
+    type = 'untyped'
+
+    def __init__(self, name, help, labels=(), callback=None):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.callback = callback
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(label, '')) for label in self.labels)
+
+    def samples(self):
+        """Yield (suffix, label names, label values, value) for each series"""
+        if self.callback:
+            values = self.callback()
+            items = values.items() if isinstance(values, dict) else [((), values)]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        for key, value in items:
+            yield '', self.labels, key, value
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(Metric):
+    type = 'gauge'
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 60)):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * len(self.buckets), 0, 0.0]  # bucket counts, count, sum
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts), count, total) for key, (counts, count, total) in self._values.items()]
+        for key, counts, count, total in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield '_bucket', self.labels + ('le',), key + (format_metric_value(bound),), cumulative
+            yield '_bucket', self.labels + ('le',), key + ('+Inf',), count
+            yield '_sum', self.labels, key, total
+            yield '_count', self.labels, key, count
+
+def escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_metric_value(value):
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+class MetricsRegistry:
+    """The metrics served at /metrics, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=(), callback=None):
+        return self._register(Counter(name, help, labels, callback))
+
+    def gauge(self, name, help, labels=(), callback=None):
+        return self._register(Gauge(name, help, labels, callback))
+
+    def histogram(self, name, help, labels=(), buckets=None):
+        return self._register(Histogram(name, help, labels, *([buckets] if buckets else [])))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                app.logger.error(f"Error collecting metric {metric.name}: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, names, values, value in samples:
+                labels = ','.join(f'{name}="{escape_label_value(label)}"' for name, label in zip(names, values))
+                lines.append(f"{metric.name}{suffix}{{{labels}}} {format_metric_value(value)}" if labels
+                             else f"{metric.name}{suffix} {format_metric_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+metrics = MetricsRegistry()
+
+CAPTURE_START_LAG = metrics.histogram(
+    'radio_recorder_capture_start_lag_seconds', 'Delay between the scheduled and the actual start of a capture',
+    ['station'], buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 300))
+CAPTURE_DURATION_RATIO = metrics.histogram(
+    'radio_recorder_capture_duration_ratio', 'Measured duration of a completed recording over the requested duration',
+    ['station'], buckets=(0.5, 0.8, 0.9, 0.95, 0.98, 0.99, 1.0, 1.01, 1.02, 1.05, 1.1))
+CAPTURES = metrics.counter(
+    'radio_recorder_captures_total', 'Captures finished, by result (completed, failed, refused)', ['station', 'result'])
+CAPTURE_RETRIES = metrics.counter(
+    'radio_recorder_capture_retries_total',
+    'ffmpeg restarts during captures, by reason (error, unhealthy, exception)', ['station', 'reason'])
+FFMPEG_EXITS = metrics.counter(
+    'radio_recorder_ffmpeg_exits_total', 'Exits of capture ffmpeg processes, by exit code', ['station', 'code'])
+RECORDED_BYTES = metrics.counter(
+    'radio_recorder_recorded_bytes_total', 'Audio bytes written by captures', ['station'])
+POST_PROCESSING_SECONDS = metrics.histogram(
+    'radio_recorder_post_processing_seconds', 'Duration of post-processing stage attempts, by outcome (done, retry, failed)',
+    ['stage', 'result'], buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900))
+FEED_REQUESTS = metrics.counter(
+    'radio_recorder_feed_requests_total', 'Podcast feed requests, by feed cache result (hit, miss)', ['cache'])
+FEED_RENDER_SECONDS = metrics.histogram(
+    'radio_recorder_feed_render_seconds', 'Time to render a podcast feed page on a feed cache miss',
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+FILE_SERVED_BYTES = metrics.counter(
+    'radio_recorder_file_served_bytes_total',
+    'Recording bytes served, by transfer method (python, x-sendfile, x-accel)', ['method'])
+FILE_REQUESTS = metrics.counter(
+    'radio_recorder_file_requests_total', 'Recording file requests, by transfer method and status code', ['method', 'code'])
+
+class RecordingTracer:
+    """Record the timeline of each recording as RecordingEvent rows.
+
+    Events are queued in memory and inserted in batches by a background
+    thread, so a capture never waits on the database to trace a step.
+    Spans (an ffmpeg run, a post-processing stage) are one event at their
+    start with their duration. Events older than RECORDING_TRACE_DAYS are
+    pruned hourly.
+    """
+
+    FLUSH_INTERVAL = 1  # seconds events may wait so a burst is written in one insert
+    PRUNE_INTERVAL = 3600
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending = threading.Event()
+        self._thread = None
+        self._next_prune = 0
+
+    def event(self, recording_id, event, detail=None, duration_seconds=None, at=None):
+        """Queue one timeline event; returns straight away."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='recording-tracer', daemon=True)
+                self._thread.start()
+        self._queue.put({
+            'recording_id': recording_id,
+            'event': event,
+            'at': at or datetime.now(),
+            'duration_seconds': duration_seconds,
+            'detail': str(detail)[:255] if detail is not None else None
+        })
+        self._pending.set()
+
+    def flush(self):
+        """Write whatever is queued now (before showing a timeline, at shutdown)."""
+        with self._write_lock:
+            self._write(self._drain())
+
+    def _drain(self):
+        events = []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _write(self, events):
+        if not events:
+            return
+        with app.app_context():
+            try:
+                db.session.execute(db.insert(RecordingEvent), events)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error(f"Error writing {len(events)} recording event(s): {e}")
+
+    def _prune(self):
+        cutoff = datetime.now() - timedelta(days=app.config['RECORDING_TRACE_DAYS'])
+        with app.app_context():
+            try:
+                deleted = RecordingEvent.query.filter(RecordingEvent.at < cutoff).delete(synchronize_session=False)
+                db.session.commit()
+                if deleted:
+                    app.logger.info(f"Pruned {deleted} recording event(s) older than {cutoff}")
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error(f"Error pruning recording events: {e}")
+
+    def _run(self):
+        while True:
+            self._pending.wait()
+            time.sleep(self.FLUSH_INTERVAL)
+            self._pending.clear()
+            self.flush()
+            if time.monotonic() >= self._next_prune:
+                self._next_prune = time.monotonic() + self.PRUNE_INTERVAL
+                self._prune()
+
+recording_tracer = RecordingTracer()
+
+# ffmpeg -progress emits blocks of key=value lines; anything else is a log line
+FFMPEG_PROGRESS_LINE = re.compile(r'^([a-z0-9_]+)=(.*)$')
+FFMPEG_SILENCE_START = re.compile(r'silence_start: (-?[\d.]+)')
+FFMPEG_SILENCE_END = re.compile(r'silence_end: ')
+# Logged by ffmpeg's http protocol when it reconnects to a dropped stream
+FFMPEG_RECONNECT_LINE = re.compile(r'[Rr]econnect')
+
+class CaptureState:
+    """Live state of one capture: its ffmpeg child, progress and recent log lines."""
+
+    def __init__(self, recording_id):
+        self.recording_id = recording_id
+        self.dispatched_at = datetime.now()
+        self.process = None
+        self.started_at = None
+        self.last_progress_at = None
+        self.last_advance_at = None  # Last time out_time moved forward
+        self.progress = {}
+        self.recent_lines = deque(maxlen=app.config['RECORDING_LOG_LINES'])
+        self.restarts = 0
+        self.stop_reason = None  # Set when the supervisor kills an unhealthy ffmpeg
+        self.station_url = None
+        self.fallback_url = None
+        self.station_name = None  # Label for the capture metrics
+        self.alerted = False
+        self.silent_since = None  # Start of the silence silencedetect is reporting, if any
+        self.size_samples = deque(maxlen=16)  # (monotonic time, total_size) for the write rate
+        self._lock = threading.Lock()
+
+    def attach(self, process, starts_at=None):
+        """Track a new ffmpeg; one started early is judged from starts_at, when its audio begins"""
+        with self._lock:
+            self.process = process
+            self.started_at = max(datetime.now(), starts_at) if starts_at else datetime.now()
+            self.last_advance_at = None
+            self.silent_since = None
+            self.size_samples.clear()
+            self.progress = {}
+
+    def detach(self):
+        with self._lock:
+            self.process = None
+
+    def update_progress(self, key, value):
+        """Record one key=value line from ffmpeg's progress output."""
+        with self._lock:
+            if key == 'total_size' and value.isdigit():
+                written = int(value) - self.progress.get('total_size', 0)
+                if written > 0:
+                    RECORDED_BYTES.inc(written, station=self.station_name)
+                    if 'total_size' not in self.progress or not self.progress['total_size']:
+                        recording_tracer.event(self.recording_id, 'first_byte', duration_seconds=(
+                            (datetime.now() - self.started_at).total_seconds() if self.started_at else None))
+                self.progress['total_size'] = int(value)
+                self.size_samples.append((time.monotonic(), int(value)))
+            elif key == 'out_time_us' and value.lstrip('-').isdigit():
+                out_time_seconds = max(0, int(value)) / 1000000
+                if out_time_seconds > self.progress.get('out_time_seconds', 0):
+                    self.last_advance_at = datetime.now()
+                self.progress['out_time_seconds'] = out_time_seconds
+            elif key == 'bitrate':
+                try:
+                    self.progress['bitrate_kbps'] = float(value.replace('kbits/s', '').strip())
+                except ValueError:
+                    pass  # ffmpeg reports N/A until it has enough data
+            elif key == 'speed':
+                self.progress['speed'] = value.strip()
+            elif key == 'progress':
+                self.last_progress_at = datetime.now()
+
+    def add_line(self, line):
+        with self._lock:
+            self.recent_lines.append(line)
+            if FFMPEG_RECONNECT_LINE.search(line):
+                recording_tracer.event(self.recording_id, 'reconnect', line)
+            # silencedetect reports a silence once it has lasted its minimum duration
+            if FFMPEG_SILENCE_START.search(line):
+                self.silent_since = datetime.now() - timedelta(seconds=app.config['CAPTURE_SILENCE_SECONDS'])
+            elif FFMPEG_SILENCE_END.search(line):
+                self.silent_since = None
+
+    def _health(self):
+        now = datetime.now()
+        since_start = (now - self.started_at).total_seconds() if self.started_at else 0
+        
+        bytes_per_second = None
+        if len(self.size_samples) >= 2:
+            (first_time, first_size), (last_time, last_size) = self.size_samples[0], self.size_samples[-1]
+            if last_time > first_time:
+                bytes_per_second = (last_size - first_size) / (last_time - first_time)
+        
+        health = {
+            'bytes_per_second': bytes_per_second,
+            'seconds_since_progress': (now - (self.last_progress_at or self.started_at)).total_seconds()
+                if self.started_at else None,
+            'seconds_since_audio': (now - (self.last_advance_at or self.started_at)).total_seconds()
+                if self.started_at else None,
+            'silent_seconds': (now - self.silent_since).total_seconds() if self.silent_since else 0,
+            'problem': None
+        }
+        
+        if not self.process or self.process.poll() is not None:
+            return health
+        stall_seconds = app.config['CAPTURE_STALL_SECONDS']
+        min_rate = app.config['CAPTURE_MIN_BYTES_PER_SECOND']
+        silence_seconds = app.config['CAPTURE_SILENCE_SECONDS']
+        if health['seconds_since_audio'] >= stall_seconds:
+            health['problem'] = f"no audio for {health['seconds_since_audio']:.0f}s"
+        elif health['seconds_since_progress'] >= stall_seconds:
+            health['problem'] = f"no progress from ffmpeg for {health['seconds_since_progress']:.0f}s"
+        elif min_rate and bytes_per_second is not None and since_start >= stall_seconds and bytes_per_second < min_rate:
+            health['problem'] = f"writing only {bytes_per_second:.0f} bytes/s"
+        elif silence_seconds and health['silent_seconds'] >= silence_seconds:
+            health['problem'] = f"silent for {health['silent_seconds']:.0f}s"
+        return health
+
+    def health(self):
+        """Write rate, time since the last progress tick and since new audio, and silence."""
+        with self._lock:
+            return self._health()
+
+    def kill_if_unhealthy(self):
+        """Kill ffmpeg if the capture breaks a health threshold; returns the problem or None."""
+        with self._lock:
+            if self.stop_reason:
+                return None
+            problem = self._health()['problem']
+            if problem:
+                self.stop_reason = problem
+                self.process.kill()
+            return problem
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'recording_id': self.recording_id,
+                'dispatched_at': self.dispatched_at.isoformat(),
+                'started_at': self.started_at.isoformat() if self.started_at else None,
+                'pid': self.process.pid if self.process else None,
+                'last_progress_at': self.last_progress_at.isoformat() if self.last_progress_at else None,
+                'last_advance_at': self.last_advance_at.isoformat() if self.last_advance_at else None,
+                'restarts': self.restarts,
+                'station_url': self.station_url,
+                'health': self._health(),
+                'progress': dict(self.progress),
+                'recent_lines': list(self.recent_lines)[-20:]
+            }
+
+def recording_log_handler(recording_id):
+    """Return a rotating file handler for the full ffmpeg log of a recording."""
+    log_dir = os.path.join(LOGS_PATH, 'recordings')
+    os.makedirs(log_dir, exist_ok=True)
+    handler = RotatingFileHandler(
+        os.path.join(log_dir, f"{recording_id}.log"),
+        maxBytes=1024 * 1024,  # 1 MB
+        backupCount=3
+    )
+    handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    return handler
+
+# Reconnect options used for every ffmpeg that reads a station URL directly
+FFMPEG_RECONNECT_OPTIONS = [
+    '-reconnect', '1',
+    '-reconnect_streamed', '1',
+    '-reconnect_delay_max', '30',
+    '-reconnect_at_eof', '1',
+    '-reconnect_on_network_error', '1',
+]
+
+class IngestSubscriber:
+    """Feeds the shared stream of a station into the stdin of one capture.
+
+    Each subscriber has its own bounded queue and writer thread, so a slow
+    capture can't hold up the other captures of the same station. Chunks
+    that arrived before start_at (an epoch timestamp) are dropped, which is
+    how a capture that connected early starts on time.
+    """
+
+    def __init__(self, recording_id, pipe, start_at=None):
+        self.recording_id = recording_id
+        self.pipe = pipe
+        self.start_at = start_at
+        self.closed = False
+        self._queue = queue.Queue(maxsize=256)  # 256 chunks of up to 64 KB
+        self._thread = threading.Thread(target=self._write, name=f"ingest-{recording_id}", daemon=True)
+        self._thread.start()
+
+    def feed(self, chunk, at=None):
+        if self.closed or (self.start_at and at is not None and at < self.start_at):
+            return
+        try:
+            self._queue.put_nowait(chunk)
+        except queue.Full:
+            app.logger.error(f"Capture {self.recording_id} is not keeping up with its station stream, disconnecting it")
+            self.close()
+
+    def close(self):
+        """Stop feeding the capture; it sees end of input once the queued data is written."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            # The writer is stuck on a capture that stopped reading. Closing the pipe waits
+            # for that write to return, so leave it to a thread of its own rather than
+            # holding up the ingest and every other capture of the station.
+            threading.Thread(target=self._close_pipe, name=f"ingest-close-{self.recording_id}", daemon=True).start()
+
+    def _write(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                break
+            try:
+                self.pipe.write(chunk)
+                self.pipe.flush()
+            except (OSError, ValueError):
+                # The capture has exited (e.g. its duration was reached)
+                self.closed = True
+                break
+        self._close_pipe()
+
+    def _close_pipe(self):
+        try:
+            self.pipe.close()
+        except (OSError, ValueError):
+            pass
+
+class StationIngest:
+    """A single upstream connection to a station, shared by all of its captures.
+
+    The stream is remuxed to MPEG-TS (which a reader can join at any point)
+    and teed to every subscribed capture, each of which applies its own start
+    and duration. The last STATION_BUFFER_SECONDS of the stream are kept,
+    so a capture joining late can still start from an earlier instant. The
+    ingest is reference counted by its subscribers and stops when the last
+    one leaves.
+    """
+
+    def __init__(self, station_url, on_idle=None):
+        self.station_url = station_url
+        self.claims = 0  # Captures about to subscribe (see StationIngestPool.get)
+        self._on_idle = on_idle  # Called once the last subscriber has left
+        self._subscribers = {}  # recording_id -> IngestSubscriber
+        self._buffer = deque()  # (arrival epoch time, chunk), oldest first
+        self._lock = threading.Lock()
+        self._process = None
+        self._thread = None
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    @property
+    def idle(self):
+        with self._lock:
+            return not self._subscribers and not self.claims
+
+    def subscribe(self, recording_id, pipe, start_at=None):
+        """Tee the stream into pipe, from start_at (epoch time) if given, else from now."""
+        with self._lock:
+            self.claims = max(0, self.claims - 1)
+            subscriber = self._subscribers[recording_id] = IngestSubscriber(recording_id, pipe, start_at)
+            if start_at is not None:
+                # Catch up from the buffer in one write, the queue holds only 256 chunks
+                buffered = b''.join(chunk for at, chunk in self._buffer if at >= start_at)
+                if buffered:
+                    subscriber.feed(buffered)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='station-ingest', daemon=True)
+                self._thread.start()
+            app.logger.info(f"Capture {recording_id} joined stream {self.station_url} "
+                            f"({len(self._subscribers)} subscriber(s))")
+
+    def unsubscribe(self, recording_id):
+        with self._lock:
+            subscriber = self._subscribers.pop(recording_id, None)
+            remaining = len(self._subscribers)
+            process = self._process if not remaining else None
+        if subscriber:
+            subscriber.close()
+            app.logger.info(f"Capture {recording_id} left stream {self.station_url} ({remaining} subscriber(s))")
+        if process and process.poll() is None:
+            # Last subscriber gone, stop pulling the station
+            process.terminate()
+        if not remaining and self._on_idle:
+            self._on_idle(self)
+
+    def _run(self):
+        last_data = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    self._buffer.clear()
+                    return
+                command = ['ffmpeg'] + FFMPEG_RECONNECT_OPTIONS + [
+                    '-i', self.station_url,
+                    '-map', '0:a',
+                    '-c', 'copy',
+                    '-v', 'error',
+                    '-f', 'mpegts',
+                    'pipe:1'
+                ]
+                app.logger.info(f"Starting shared ingest: {' '.join(command)}")
+                self._process = process = subprocess.Popen(
+                    command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+                )
+            threading.Thread(target=self._log_errors, args=(process,), daemon=True).start()
+            
+            try:
+                while True:
+                    # With its reconnect options ffmpeg can stay up sending nothing, so don't block
+                    # on the read forever: kill it once the stream has been idle too long
+                    readable, _, _ = select.select([process.stdout], [], [], 1)
+                    if not readable:
+                        if time.monotonic() - last_data > app.config['STATION_INGEST_IDLE_TIMEOUT']:
+                            process.kill()
+                            break
+                        continue
+                    chunk = os.read(process.stdout.fileno(), 65536)
+                    if not chunk:
+                        break
+                    last_data = time.monotonic()
+                    arrived = time.time()
+                    with self._lock:
+                        # Buffer and snapshot together, so a capture subscribing now gets this chunk exactly once
+                        self._buffer.append((arrived, chunk))
+                        while self._buffer and self._buffer[0][0] < arrived - app.config['STATION_BUFFER_SECONDS']:
+                            self._buffer.popleft()
+                        subscribers = list(self._subscribers.values())
+                    for subscriber in subscribers:
+                        subscriber.feed(chunk, arrived)
+            finally:
+                if process.poll() is None:
+                    process.terminate()
+                process.wait()
+                process.stdout.close()
+            
+            with self._lock:
+                self._process = None
+                if not self._subscribers:
+                    self._thread = None
+                    self._buffer.clear()
+                    return
+                
+                stalled = time.monotonic() - last_data > app.config['STATION_INGEST_IDLE_TIMEOUT']
+                if stalled:
+                    # Give the captures end of input so their own retry logic takes over
+                    app.logger.error(f"No data from {self.station_url} for "
+                                     f"{app.config['STATION_INGEST_IDLE_TIMEOUT']}s, releasing its captures")
+                    for subscriber in self._subscribers.values():
+                        subscriber.close()
+                    self._subscribers.clear()
+                    self._buffer.clear()
+                    self._thread = None
+            if stalled:
+                if self._on_idle:
+                    self._on_idle(self)
+                return
+            
+            app.logger.warning(f"Shared ingest for {self.station_url} exited with code {process.returncode}, reconnecting")
+            time.sleep(2)
+
+    def _log_errors(self, process):
+        for raw_line in process.stderr:
+            line = raw_line.decode('utf-8', errors='replace').rstrip()
+            if line:
+                app.logger.warning(f"Ingest {self.station_url}: {line}")
+        process.stderr.close()
+
+class StationIngestPool:
+    """Keeps one StationIngest per station URL, for as long as it has captures."""
+
+    def __init__(self):
+        self._ingests = {}
+        self._lock = threading.Lock()
+
+    def get(self, station_url):
+        """The shared ingest of a station, created on first use.
+
+        The caller is expected to subscribe to it; until it does, the ingest
+        is claimed so it isn't dropped from the pool in between.
+        """
+        with self._lock:
+            ingest = self._ingests.get(station_url)
+            if ingest is None:
+                ingest = self._ingests[station_url] = StationIngest(station_url, on_idle=self._discard)
+            with ingest._lock:
+                ingest.claims += 1
+            return ingest
+
+    def _discard(self, ingest):
+        """Forget an ingest that has no captures left."""
+        with self._lock:
+            if self._ingests.get(ingest.station_url) is ingest and ingest.idle:
+                del self._ingests[ingest.station_url]
+
+    def status(self):
+        """Number of subscribed captures per live station URL."""
+        with self._lock:
+            ingests = list(self._ingests.values())
+        return {ingest.station_url: ingest.subscriber_count for ingest in ingests if ingest.subscriber_count}
+
+station_ingests = StationIngestPool()
+
+def run_ffmpeg(command, capture, ingest=None, start_at=None):
+    """Run ffmpeg and parse its output as it arrives instead of buffering it.
+
+    Progress lines update the capture's live status, log lines go to the
+    capture's bounded ring and to the per-recording log file. When ingest
+    is given, ffmpeg reads that station stream on stdin, starting with the
+    audio that arrives at start_at. Returns the ffmpeg exit code.
+    """
+    log_handler = recording_log_handler(capture.recording_id)
+
+    def write_log(message):
+        log_handler.handle(logging.makeLogRecord({'msg': message, 'levelno': logging.INFO, 'levelname': 'INFO'}))
+
+    try:
+        write_log(f"Running command: {' '.join(command)}")
+        spawned_at = datetime.now()
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE if ingest else subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+        capture.attach(process, start_at)
+        source = f"stream of {ingest.station_url}" if ingest else capture.station_url
+        if start_at and start_at > spawned_at:
+            source += f", audio from {start_at:%H:%M:%S}"
+        recording_tracer.event(capture.recording_id, 'ffmpeg_spawned', source, at=spawned_at)
+        if ingest:
+            ingest.subscribe(capture.recording_id, process.stdin, start_at.timestamp() if start_at else None)
+        try:
+            for raw_line in process.stderr:
+                line = raw_line.decode('utf-8', errors='replace').rstrip()
+                if not line:
+                    continue
+
+                match = FFMPEG_PROGRESS_LINE.match(line)
+                if match:
+                    capture.update_progress(match.group(1), match.group(2))
+                else:
+                    capture.add_line(line)
+                    write_log(line)
+            process.wait()
+        finally:
+            if ingest:
+                ingest.unsubscribe(capture.recording_id)
+            capture.detach()
+
+        write_log(f"ffmpeg exited with code {process.returncode}")
+        recording_tracer.event(capture.recording_id, 'ffmpeg_exit', f"exit code {process.returncode}",
+                               duration_seconds=(datetime.now() - spawned_at).total_seconds())
+        return process.returncode
+    finally:
+        log_handler.close()
+
+def segments_directory(output_file):
+    """Directory holding the not yet finalised segments of a capture."""
+    return f"{output_file}.segments"
+
+def list_segments(output_file):
+    """Return the segment files of a capture in recording order."""
+    segments_dir = segments_directory(output_file)
+    if not os.path.isdir(segments_dir):
+        return []
+    return [os.path.join(segments_dir, name) for name in sorted(os.listdir(segments_dir))
+            if name.startswith('segment-')]
+
+def next_segment_number(output_file):
+    """Number for the first segment of a new attempt, following any segments already on disk."""
+    numbers = []
+    for segment in list_segments(output_file):
+        match = re.match(r'segment-(\d+)', os.path.basename(segment))
+        if match:
+            numbers.append(int(match.group(1)))
+    return max(numbers) + 1 if numbers else 0
+
+def append_file(destination, source):
+    """Append source to the end of destination.
+
+    Uses copy_file_range so the data is copied inside the kernel (or shared
+    extents on filesystems that support it), falling back to a plain
+    read/write loop.
+    """
+    src_fd = os.open(source, os.O_RDONLY)
+    try:
+        dst_fd = os.open(destination, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            os.lseek(dst_fd, 0, os.SEEK_END)
+            remaining = os.fstat(src_fd).st_size
+            use_kernel_copy = hasattr(os, 'copy_file_range')
+            
+            while remaining > 0:
+                copied = 0
+                if use_kernel_copy:
+                    try:
+                        copied = os.copy_file_range(src_fd, dst_fd, remaining)
+                    except OSError:
+                        use_kernel_copy = False
+                if not use_kernel_copy:
+                    data = os.read(src_fd, min(remaining, 1024 * 1024))
+                    view = memoryview(data)
+                    while view:
+                        view = view[os.write(dst_fd, view):]
+                    copied = len(data)
+                if copied == 0:
+                    break
+                remaining -= copied
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+
+def finalize_segments(output_file):
+    """Append all pending segments to output_file and remove them.
+
+    Returns the number of segments appended.
+    """
+    segments = list_segments(output_file)
+    for segment in segments:
+        if os.path.getsize(segment) > 0:
+            if not os.path.exists(output_file) or os.path.getsize(output_file) == 0:
+                # Nothing to append to yet, the first segment becomes the file
+                os.replace(segment, output_file)
+                continue
+            append_file(output_file, segment)
+        os.remove(segment)
+    
+    segments_dir = segments_directory(output_file)
+    if os.path.isdir(segments_dir) and not os.listdir(segments_dir):
+        os.rmdir(segments_dir)
+    return len(segments)
+
+# MPEG audio header tables, indexed by [version][layer][bitrate index] (kbps)
+MPEG_BITRATES = {
+    1: {
+        1: [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+        2: [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+        3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    },
+    2: {
+        1: [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+        2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+        3: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    },
+}
+MPEG_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}
+ADTS_SAMPLE_RATES = [96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050, 16000, 12000, 11025, 8000, 7350]
+
+# Probe results keyed by (path, size, mtime), so unchanged files are never parsed twice
+_audio_probe_cache = OrderedDict()
+_audio_probe_lock = threading.Lock()
+AUDIO_PROBE_CACHE_SIZE = 1024
+
+def _parse_mpeg_header(data, offset):
+    """Parse an MPEG audio frame header.
+
+    Returns (frame_length, samples_per_frame, sample_rate, bitrate_kbps, layer, version, channels) or None.
+    """
+    if offset + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[offset], data[offset + 1], data[offset + 2], data[offset + 3]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    
+    version = {0: 2.5, 2: 2, 3: 1}.get((b1 >> 3) & 0x03)
+    layer = {1: 3, 2: 2, 3: 1}.get((b1 >> 1) & 0x03)
+    bitrate_index = (b2 >> 4) & 0x0F
+    sample_rate_index = (b2 >> 2) & 0x03
+    if version is None or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    
+    bitrate = MPEG_BITRATES[1 if version == 1 else 2][layer][bitrate_index]
+    sample_rate = MPEG_SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 0x01
+    channels = 1 if (b3 >> 6) == 3 else 2
+    
+    if layer == 1:
+        samples = 384
+        frame_length = (12 * bitrate * 1000 // sample_rate + padding) * 4
+    elif layer == 3 and version != 1:
+        samples = 576
+        frame_length = 72 * bitrate * 1000 // sample_rate + padding
+    else:
+        samples = 1152
+        frame_length = 144 * bitrate * 1000 // sample_rate + padding
+    return frame_length, samples, sample_rate, bitrate, layer, version, channels
+
+def _find_mpeg_frame(data, offset, limit=65536):
+    """Find the next MPEG frame header that is followed by another valid header."""
+    end = min(len(data) - 4, offset + limit)
+    while offset < end:
+        offset = data.find(b'\xff', offset, end)
+        if offset < 0:
+            return None
+        header = _parse_mpeg_header(data, offset)
+        if header and (offset + header[0] >= len(data) or _parse_mpeg_header(data, offset + header[0])):
+            return offset
+        offset += 1
+    return None
+
+def _probe_mpeg_audio(data, offset):
+    """Duration and bitrate of an MPEG audio (MP3/MP2) stream starting at offset."""
+    first = _find_mpeg_frame(data, offset)
+    if first is None:
+        return None
+    frame_length, samples, sample_rate, bitrate, layer, version, channels = _parse_mpeg_header(data, first)
+    audio_bytes = len(data) - first
+    codec = {1: 'mp1', 2: 'mp2', 3: 'mp3'}[layer]
+    
+    # A Xing/Info or VBRI header in the first frame carries the frame count
+    frames = None
+    header_bytes = None
+    side_info = (32 if channels == 2 else 17) if version == 1 else (17 if channels == 2 else 9)
+    xing = first + 4 + side_info
+    if data[xing:xing + 4] in (b'Xing', b'Info'):
+        flags = struct.unpack('>I', data[xing + 4:xing + 8])[0]
+        field = xing + 8
+        if flags & 0x01:
+            frames = struct.unpack('>I', data[field:field + 4])[0]
+            field += 4
+        if flags & 0x02:
+            header_bytes = struct.unpack('>I', data[field:field + 4])[0]
+    elif data[first + 36:first + 40] == b'VBRI':
+        header_bytes, frames = struct.unpack('>II', data[first + 46:first + 54])
+    
+    # Trust the header only if it describes the whole file (appended segments don't update it)
+    if frames and (header_bytes is None or abs(header_bytes - audio_bytes) <= audio_bytes * 0.02):
+        duration = frames * samples / sample_rate
+        return {'codec': codec, 'sample_rate': sample_rate, 'duration': duration,
+                'bitrate_kbps': round(audio_bytes * 8 / duration / 1000) if duration else bitrate}
+    
+    # Constant bitrate streams (most radio) can be measured from the file size,
+    # if runs of frames sampled across the file all share the first frame's bitrate
+    constant = True
+    for fraction in (0, 0.25, 0.5, 0.75):
+        position = _find_mpeg_frame(data, first + int(audio_bytes * fraction))
+        for _ in range(8):
+            if position is None or position >= len(data):
+                break
+            header = _parse_mpeg_header(data, position)
+            if not header or header[3] != bitrate:
+                constant = False
+                break
+            position += header[0]
+        if not constant:
+            break
+    if constant:
+        return {'codec': codec, 'sample_rate': sample_rate, 'bitrate_kbps': bitrate,
+                'duration': audio_bytes * 8 / (bitrate * 1000)}
+    
+    # Variable bitrate without a usable header: walk every frame
+    total_samples = 0
+    position = first
+    while position is not None and position < len(data):
+        header = _parse_mpeg_header(data, position)
+        if not header:
+            position = _find_mpeg_frame(data, position + 1)
+            continue
+        total_samples += header[1]
+        position += header[0]
+    duration = total_samples / sample_rate
+    return {'codec': codec, 'sample_rate': sample_rate, 'duration': duration,
+            'bitrate_kbps': round(audio_bytes * 8 / duration / 1000) if duration else bitrate}
+
+def _probe_adts_audio(data, offset):
+    """Duration and bitrate of an AAC stream in ADTS framing starting at offset."""
+    position = data.find(b'\xff', offset, offset + 65536)
+    if position < 0 or len(data) < position + 7 or (data[position + 1] & 0xF6) != 0xF0:
+        return None
+    
+    sample_rate_index = (data[position + 2] >> 2) & 0x0F
+    if sample_rate_index >= len(ADTS_SAMPLE_RATES):
+        return None
+    sample_rate = ADTS_SAMPLE_RATES[sample_rate_index]
+    
+    first = position
+    total_samples = 0
+    while position + 7 <= len(data):
+        if data[position] != 0xFF or (data[position + 1] & 0xF6) != 0xF0:
+            # Lost sync (e.g. a joined segment boundary), look for the next frame
+            position = data.find(b'\xff', position + 1)
+            if position < 0:
+                break
+            continue
+        frame_length = ((data[position + 3] & 0x03) << 11) | (data[position + 4] << 3) | (data[position + 5] >> 5)
+        if frame_length < 7:
+            position += 1
+            continue
+        total_samples += ((data[position + 6] & 0x03) + 1) * 1024
+        position += frame_length
+    
+    duration = total_samples / sample_rate
+    return {'codec': 'aac', 'sample_rate': sample_rate, 'duration': duration,
+            'bitrate_kbps': round((len(data) - first) * 8 / duration / 1000) if duration else None}
+
+def _probe_audio_data(data):
+    offset = 0
+    # Skip an ID3v2 tag
+    if data[:3] == b'ID3' and len(data) >= 10:
+        tag_size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        offset = 10 + tag_size + (10 if data[5] & 0x10 else 0)
+    
+    return _probe_adts_audio(data, offset) or _probe_mpeg_audio(data, offset)
+
+def probe_audio_file(path):
+    """Return codec, sample rate, bitrate and duration of an MP3/AAC file without running ffprobe.
+
+    Results are cached by (path, size, mtime). Returns None if the file is
+    missing or not in a format we can parse.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if stat.st_size == 0:
+        return None
+    
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    with _audio_probe_lock:
+        if key in _audio_probe_cache:
+            _audio_probe_cache.move_to_end(key)
+            return _audio_probe_cache[key]
+    
+    try:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            info = _probe_audio_data(data)
+    except (OSError, ValueError, struct.error) as e:
+        app.logger.warning(f"Could not parse audio file {path}: {e}")
+        info = None
+    
+    with _audio_probe_lock:
+        _audio_probe_cache[key] = info
+        while len(_audio_probe_cache) > AUDIO_PROBE_CACHE_SIZE:
+            _audio_probe_cache.popitem(last=False)
+    return info
+
+def scheduled_start_of(recording, started):
+    """When this run of a recording was due: its start time, or for a recurring
+    recording its time of day on the day nearest to started"""
+    if not recording.start_time:
+        return None
+    if not recording.recurring:
+        return recording.start_time
+    scheduled = datetime.combine(started.date(), recording.start_time.time())
+    # The job fires early by the warm-up and pre-roll, so 00:01 can be due the next day
+    if scheduled - started > timedelta(hours=12):
+        scheduled -= timedelta(days=1)
+    elif scheduled - started < -timedelta(hours=12):
+        scheduled += timedelta(days=1)
+    return scheduled
+
+def audio_duration(path):
+    """Duration of an audio file in seconds, or None if it can't be determined."""
+    info = probe_audio_file(path)
+    return info['duration'] if info else None
+
+def record_audio(recording_id, station_url, output_file, duration_seconds, capture=None, resume=False):
+    """Record audio from a stream URL to a file for a specified duration with retry capability.
+
+    With resume, an interrupted capture is picked up again: duration_seconds
+    already covers the pre-roll and post-roll and the start isn't aligned.
+    """
+    if capture is None:
+        capture = CaptureState(recording_id)
+    
     with app.app_context():  # Create app context for database access
         # Find the recording
         recording_db = Recording.query.get(recording_id)
@@ -262,15 +1459,36 @@ def record_audio(recording_id, station_url, output_file, duration_seconds):
             print(f"Recording {recording_id} not found.")
             return
         
+        # The audio starts pre_roll seconds before the scheduled start and runs post_roll past its end
+        resumed = resume or recording_db.status == RecordingStatus.IN_PROGRESS
+        if not resumed:
+            duration_seconds += (recording_db.pre_roll_seconds or 0) + (recording_db.post_roll_seconds or 0)
+        current_time = datetime.now()
+        scheduled_start = scheduled_start_of(recording_db, current_time)
+        audio_start = None
+        if scheduled_start and not resumed:
+            audio_start = scheduled_start - timedelta(seconds=recording_db.pre_roll_seconds or 0)
+            if audio_start < current_time - timedelta(seconds=app.config['STATION_BUFFER_SECONDS']):
+                audio_start = None  # Dispatched too late, the buffered stream doesn't go back that far
+        # A capture dispatched ahead of time connects now and waits for its audio on the open stream
+        waits = audio_start is not None and audio_start > current_time
+        
         # Create a unique output file based on current date/time with consistent format
         # Get base directory and file information
         base_directory = os.path.dirname(output_file)
         extension = os.path.splitext(output_file)[1]
         
-        # Format: [StationName]YYMMDD-DDD.mp3 (2-digit year)
-        current_time = datetime.now()
-        formatted_date = current_time.strftime('%y%m%d')  # Using 2-digit year, month, and day
-        day_name = current_time.strftime('%a')  # 3-letter day abbreviation (Sun, Mon, etc.)
+        # Format: [StationName]YYMMDD-DDD.mp3 (2-digit year), dated by the show rather than the dispatch
+        episode_time = scheduled_start or current_time
+        formatted_date = episode_time.strftime('%y%m%d')  # Using 2-digit year, month, and day
+        day_name = episode_time.strftime('%a')  # 3-letter day abbreviation (Sun, Mon, etc.)
+        
+        # Capture straight into local storage, so the local storage stage has nothing to copy
+        if app.config['CAPTURE_TO_LOCAL_STORAGE'] and recording_db.save_to_local:
+            recording_db.actual_start_time = audio_start if waits else current_time
+            base_directory = local_storage_directory(recording_db)
+            # The file is the user's local copy from the start, so retention and eviction leave it alone
+            recording_db.local_copy_method = 'in_place'
         
         # Use station name, date and day of week for the new format
         episode_title = f"{recording_db.station.name}{formatted_date}-{day_name}"
@@ -282,18 +1500,39 @@ def record_audio(recording_id, station_url, output_file, duration_seconds):
         # Create the output directory if it doesn't exist
         os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
         
+        # Space this row already accounts for, from an earlier run of a recurring recording
+        previous_size = (recording_db.file_size or 0) if recording_db.status == RecordingStatus.COMPLETED else 0
+        
         # Update the recording status to 'in_progress'
-        recording_db.status = 'in_progress'
-        recording_db.actual_start_time = datetime.now()
+        recording_db.status = RecordingStatus.IN_PROGRESS
+        recording_db.actual_start_time = audio_start if waits else datetime.now()
         recording_db.output_file = output_file  # Save the actual output file path
         db.session.commit()
         
+        capture.station_name = recording_db.station.name
+        if scheduled_start and not resumed:
+            # Lag against the instant the audio should begin, so a pre-roll doesn't count as early
+            due = scheduled_start - timedelta(seconds=recording_db.pre_roll_seconds or 0)
+            lag = (recording_db.actual_start_time - due).total_seconds()
+            CAPTURE_START_LAG.observe(lag, station=capture.station_name)
+            if waits:
+                detail = f"connecting {(audio_start - current_time).total_seconds():.1f}s before the audio starts"
+            else:
+                detail = f"{lag:.1f}s after the scheduled start"
+            recording_tracer.event(recording_id, 'capture_started', detail, at=current_time)
+        else:
+            recording_tracer.event(recording_id, 'capture_started', "resumed", at=recording_db.actual_start_time)
+        
         # Log start of recording
         app.logger.info(f"Starting recording: {recording_id}")
         app.logger.info(f"  - Output file: {output_file}")
         app.logger.info(f"  - Duration: {duration_seconds} seconds")
         app.logger.info(f"  - URL: {station_url}")
         
+        # Fold in segments left behind by an interrupted capture, so a resume
+        # only ever appends new audio to the existing file
+        finalize_segments(output_file)
+        
         # Check if the output file already exists and has content
         file_exists = os.path.exists(output_file)
         file_size = 0
@@ -306,15 +1545,9 @@ def record_audio(recording_id, station_url, output_file, duration_seconds):
             
             # Get approximate duration of existing recording
             try:
-                # Use ffprobe to get existing duration
-                probe_cmd = [
-                    'ffprobe', 
-                    '-v', 'error', 
-                    '-show_entries', 'format=duration', 
-                    '-of', 'default=noprint_wrappers=1:nokey=1', 
-                    output_file
-                ]
-                existing_duration = float(subprocess.check_output(probe_cmd).decode('utf-8').strip())
+                existing_duration = audio_duration(output_file)
+                if existing_duration is None:
+                    raise ValueError("unrecognised audio format")
                 
                 # Calculate remaining duration
                 remaining_duration = max(0, duration_seconds - existing_duration)
@@ -322,9 +1555,10 @@ def record_audio(recording_id, station_url, output_file, duration_seconds):
                 
                 if remaining_duration <= 0:
                     app.logger.info(f"Recording already complete, marking as finished")
-                    recording_db.status = 'completed'
+                    recording_db.status = RecordingStatus.COMPLETED
                     recording_db.end_time = datetime.now()
                     db.session.commit()
+                    recording_tracer.event(recording_id, 'completed', "already complete")
                     return
                 
                 # Update duration to record only the remaining time
@@ -333,267 +1567,183 @@ def record_audio(recording_id, station_url, output_file, duration_seconds):
                 app.logger.warning(f"Could not determine existing recording duration: {e}")
                 # Continue with the full duration as fallback
         
+        # Make sure the capture will fit, evicting old episodes if needed
+        admitted, message = storage_manager.admit(recording_db, duration_seconds)
+        if not admitted:
+            app.logger.error(f"Refusing to start recording {recording_id}: {message}")
+            recording_db.status = RecordingStatus.FAILED
+            recording_db.end_time = datetime.now()
+            recording_db.error = message
+            db.session.commit()
+            CAPTURES.inc(station=capture.station_name, result='refused')
+            recording_tracer.event(recording_id, 'refused', message)
+            return
+        
+        # Restarts after a stall never run past the end of the slot
+        slot_end = (audio_start if waits else datetime.now()) + timedelta(seconds=duration_seconds)
+        capture.station_url = station_url
+        capture.fallback_url = recording_db.station.fallback_url
+        
         # Create the ffmpeg command to record the stream
         max_retries = 3
         retry_count = 0
         success = False
+        segments_dir = segments_directory(output_file)
         
         while retry_count < max_retries and not success:
             try:
-                if file_exists and file_size > 0:
-                    # Create a temporary file for the new recording segment
-                    temp_output = f"{output_file}.part"
-                    
-                    # Record to temporary file
-                    command = [
-                        'ffmpeg',
-                        '-reconnect', '1',
-                        '-reconnect_streamed', '1',
-                        '-reconnect_delay_max', '30',
-                        '-reconnect_at_eof', '1',
-                        '-reconnect_on_network_error', '1',
-                        '-i', station_url,
-                        '-t', str(duration_seconds),
-                        '-c:a', 'copy',
-                        '-v', 'warning',
-                        temp_output
-                    ]
+                # Record into fixed-length segments next to the output file.
+                # Segments from earlier attempts are kept and numbering continues after them.
+                os.makedirs(segments_dir, exist_ok=True)
+                if app.config['SHARE_STATION_STREAMS']:
+                    # Read the station's shared stream, so overlapping captures use one connection
+                    ingest = station_ingests.get(station_url)
+                elif audio_start and audio_start > datetime.now():
+                    # Still early: hold a private connection and start from the exact instant
+                    ingest = StationIngest(station_url)
+                else:
+                    ingest = None
+                if ingest:
+                    input_options = ['-f', 'mpegts', '-i', 'pipe:0']
                 else:
-                    # Record directly to output file if it doesn't exist or is empty
-                    command = [
-                        'ffmpeg',
-                        '-y',
-                        '-reconnect', '1',
-                        '-reconnect_streamed', '1',
-                        '-reconnect_delay_max', '30',
-                        '-reconnect_at_eof', '1',
-                        '-reconnect_on_network_error', '1',
-                        '-i', station_url,
+                    input_options = FFMPEG_RECONNECT_OPTIONS + ['-i', station_url]
+                
+                command = ['ffmpeg'] + input_options + [
+                    '-t', str(duration_seconds),
+                    '-c:a', 'copy',
+                    '-v', 'warning',
+                    '-nostats',
+                    '-progress', 'pipe:2',
+                    '-f', 'segment',
+                    '-segment_time', str(app.config['RECORDING_SEGMENT_SECONDS']),
+                    '-segment_start_number', str(next_segment_number(output_file))
+                ]
+                if extension.lower() == '.mp3':
+                    # Segments are joined byte-for-byte, so leave out the per-file ID3 and Xing headers
+                    command += ['-segment_format_options', 'id3v2_version=0:write_xing=0']
+                command.append(os.path.join(segments_dir, f"segment-%05d{extension}"))
+                
+                silence_seconds = app.config['CAPTURE_SILENCE_SECONDS']
+                if silence_seconds:
+                    # Decode the audio a second time, only to report silences (logged at info level)
+                    command[command.index('-v') + 1] = 'info'
+                    command += [
+                        '-map', '0:a',
+                        '-af', f"silencedetect=n={app.config['CAPTURE_SILENCE_NOISE_DB']}dB:d={silence_seconds}",
                         '-t', str(duration_seconds),
-                        '-c:a', 'copy',
-                        '-v', 'warning',
-                        output_file
+                        '-f', 'null', '-'
                     ]
                 
-                # Start the process and capture output
+                # Start the process and stream its output
                 app.logger.info(f"Running command: {' '.join(command)}")
-                process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                
-                # Wait for the process to complete
-                stdout, stderr = process.communicate()
+                returncode = run_ffmpeg(command, capture, ingest, audio_start)
+                audio_start = None  # Restarts and retries take the stream from when they reconnect
+                FFMPEG_EXITS.inc(station=capture.station_name, code=returncode)
                 
                 # Check if the recording was successful
-                if process.returncode == 0:
-                    # If we were recording to a temporary file, now concatenate it
-                    if file_exists and file_size > 0 and os.path.exists(temp_output):
-                        concat_cmd = [
-                            'ffmpeg',
-                            '-y',
-                            '-i', 'concat:' + output_file + '|' + temp_output,
-                            '-c', 'copy',
-                            output_file + '.new'
-                        ]
-                        
-                        app.logger.info(f"Concatenating files: {' '.join(concat_cmd)}")
-                        concat_process = subprocess.Popen(concat_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                        concat_stdout, concat_stderr = concat_process.communicate()
-                        
-                        if concat_process.returncode == 0:
-                            # Replace original with concatenated file
-                            os.remove(output_file)
-                            os.rename(output_file + '.new', output_file)
-                            os.remove(temp_output)
-                            app.logger.info("Successfully appended to existing recording")
-                        else:
-                            app.logger.error(f"Failed to concatenate files: {concat_stderr.decode('utf-8')}")
-                            # Keep the partial recording as backup
-                            os.rename(temp_output, output_file + '.part')
+                if returncode == 0:
+                    # Append the new segments to the episode; this costs only the new audio
+                    appending_at = datetime.now()
+                    appended = finalize_segments(output_file)
+                    app.logger.info(f"Appended {appended} segment(s) to {output_file}")
+                    recording_tracer.event(recording_id, 'segments_appended', f"{appended} segment(s)", at=appending_at,
+                                           duration_seconds=(datetime.now() - appending_at).total_seconds())
                     
                     # Success - update recording status
-                    recording_db.status = 'completed'
+                    recording_db.status = RecordingStatus.COMPLETED
                     recording_db.end_time = datetime.now()
                     db.session.commit()
                     
                     app.logger.info(f"Recording completed successfully: {recording_id}")
                     
-                    # Get file size
+                    # Get file size and measured duration
                     if os.path.exists(output_file):
                         recording_db.file_size = os.path.getsize(output_file)
+                        recording_db.actual_duration_seconds = audio_duration(output_file)
                         db.session.commit()
+                    CAPTURES.inc(station=capture.station_name, result='completed')
+                    recording_tracer.event(recording_id, 'completed', (
+                        f"{recording_db.file_size} bytes, {recording_db.actual_duration_seconds or 0:.0f}s "
+                        f"of {recording_db.capture_seconds}s"))
+                    if recording_db.actual_duration_seconds and recording_db.capture_seconds:
+                        CAPTURE_DURATION_RATIO.observe(recording_db.actual_duration_seconds / recording_db.capture_seconds,
+                                                       station=capture.station_name)
+                    storage_manager.recording_completed(recording_db, previous_size)
+                    file_index.file_written(output_file, recording_id)
+                    storage_manager.release(recording_id)
+                    storage_manager.enforce_watermarks()
                     
-                    # Save to local storage if enabled
-                    if recording_db.save_to_local:
-                        app.logger.info(f"Saving copy to local storage for recording: {recording_id}")
-                        
-                        try:
-                            # Get local folder from recording
-                            local_folder = recording_db.local_folder
-                            
-                            # If no folder specified in recording, try to get from user settings
-                            if not local_folder and hasattr(recording_db, 'user_id') and recording_db.user_id:
-                                creator = User.query.get(recording_db.user_id)
-                                user_settings = UserSettings.query.filter_by(user_id=creator.id).first() if creator else None
-                                if user_settings:
-                                    local_folder = user_settings.local_storage_path
-                            
-                            # Fall back to default folder if needed
-                            if not local_folder:
-                                # Use a default location under recordings folder
-                                local_folder = os.path.join(app.config['RECORDINGS_FOLDER'], 'local_storage')
-                                app.logger.info(f"Using default local folder: {local_folder}")
-                            
-                            create_structure = recording_db.create_folder_structure
-                            
-                            if create_structure:
-                                # Create folder structure: [Base Path]/[Station Name]/YYYY/MM-MMM/
-                                year_folder = current_time.strftime('%Y')
-                                month_folder = current_time.strftime('%-m-%b')  # 3-Mar format
-                                station_folder = recording_db.station.name
-                                
-                                local_path = os.path.join(local_folder, station_folder, year_folder, month_folder)
-                            else:
-                                local_path = local_folder
-                            
-                            # Create directory if it doesn't exist
-                            os.makedirs(local_path, exist_ok=True)
-                            
-                            # Full path including filename
-                            local_file_path = os.path.join(local_path, os.path.basename(output_file))
-                            
-                            # Copy the file
-                            shutil.copy2(output_file, local_file_path)
-                            
-                            app.logger.info(f"Local copy created at: {local_file_path}")
-                            recording_db.local_status = 'success'
-                        except Exception as e:
-                            error_msg = str(e)
-                            app.logger.error(f"Local storage copy failed: {error_msg}")
-                            recording_db.local_status = 'failed'
-                            recording_db.local_error = error_msg
-                        
-                        db.session.commit()
+                    # The episode is now part of its podcast feed
+                    if recording_db.podcast_uuid:
+                        podcast_feeds.invalidate(recording_db.podcast_uuid)
                     
-                    # Handle Nextcloud upload if enabled
-                    if recording_db.save_to_nextcloud:
-                        app.logger.info(f"Attempting Nextcloud upload for recording: {recording_id}")
-                        
-                        # Get the user for their Nextcloud settings
-                        creator = User.query.get(recording_db.user_id) if recording_db.user_id else None
-                        
-                        # Get user settings
-                        user_settings = UserSettings.query.filter_by(user_id=creator.id).first() if creator else None
-                        
-                        if creator and user_settings and user_settings.nextcloud_url and user_settings.nextcloud_username and user_settings.nextcloud_password:
-                            # Determine remote path
-                            base_remote_path = recording_db.nextcloud_folder or '/Recordings/'
-                            if not base_remote_path.endswith('/'):
-                                base_remote_path += '/'
-                                
-                            # Create folder structure if enabled
-                            if recording_db.nextcloud_create_folder_structure:
-                                # Create folder structure: [Base Path]/[Station Name]/YYYY/MM-MMM/
-                                current_time = datetime.now()
-                                year_folder = current_time.strftime('%Y')
-                                month_folder = current_time.strftime('%-m-%b')  # 3-Mar format
-                                station_folder = recording_db.station.name
-                                
-                                remote_path = f"{base_remote_path}{station_folder}/{year_folder}/{month_folder}/"
-                                app.logger.info(f"Using structured NextCloud path: {remote_path}")
-                            else:
-                                remote_path = base_remote_path
-                                
-                            # Add filename to path
-                            remote_path += os.path.basename(output_file)
-                            
-                            # Attempt upload
-                            success, message = upload_to_nextcloud(
-                                output_file,
-                                remote_path,
-                                user_settings.nextcloud_url,
-                                user_settings.nextcloud_username,
-                                user_settings.nextcloud_password
-                            )
-                            
-                            if success:
-                                app.logger.info(f"Nextcloud upload successful: {message}")
-                                recording_db.nextcloud_status = 'Uploaded'
-                                recording_db.nextcloud_path = remote_path
-                            else:
-                                app.logger.error(f"Nextcloud upload failed: {message}")
-                                recording_db.nextcloud_status = f'Failed: {message}'
-                            
-                            db.session.commit()
+                    # Copies, upload, retention and notification run on the post-processing
+                    # workers, so the capture slot is free as soon as the audio is on disk
+                    post_processor.enqueue(recording_db)
                     
-                    # Run retention policy check if needed
-                    if recording_db.max_recordings > 0 and recording_db.podcast_uuid:
-                        clean_up_old_recordings(recording_db.podcast_uuid, recording_db.max_recordings)
+                    success = True
+                else:
+                    captured = capture.progress.get('out_time_seconds', 0)
                     
-                    # After the recording is complete and marked as successful
-                    if recording_db.pushover_enabled and recording_db.user_id:
-                        app.logger.info(f"Sending Pushover notification for completed recording: {recording_id}")
+                    if capture.stop_reason:
+                        # Killed by the supervisor because it was unhealthy: append the rest of
+                        # the slot straight away, without using up a retry
+                        remaining_slot = (slot_end - datetime.now()).total_seconds()
+                        app.logger.warning(f"Restarting unhealthy capture {recording_id}: {capture.stop_reason}")
                         
-                        # Get actual recording duration using ffprobe
-                        actual_duration = 0
-                        try:
-                            probe_cmd = [
-                                'ffprobe', 
-                                '-v', 'error', 
-                                '-show_entries', 'format=duration', 
-                                '-of', 'default=noprint_wrappers=1:nokey=1', 
-                                output_file
-                            ]
-                            actual_duration = float(subprocess.check_output(probe_cmd, timeout=15).decode('utf-8').strip())
-                        except Exception as e:
-                            app.logger.warning(f"Could not determine actual duration: {e}")
-                            actual_duration = recording_db.duration_seconds
-                        
-                        # Format the duration nicely
-                        minutes, seconds = divmod(int(actual_duration), 60)
-                        hours, minutes = divmod(minutes, 60)
-                        
-                        if hours > 0:
-                            duration_str = f"{hours}h {minutes}m {seconds}s"
-                        else:
-                            duration_str = f"{minutes}m {seconds}s"
-                        
-                        # Create notification message
-                        title = f"Recording Complete: {recording_db.station.name}"
-                        message = f"Recording '{os.path.basename(output_file)}' completed successfully.\n"
-                        message += f"Duration: {duration_str}"
-                        
-                        # Include file size if available
-                        if recording_db.file_size:
-                            file_size_mb = recording_db.file_size / (1024 * 1024)
-                            message += f"\nSize: {file_size_mb:.2f} MB"
+                        if not capture.alerted and recording_db.pushover_enabled and recording_db.user_id:
+                            send_pushover_notification(
+                                recording_db.user_id,
+                                f"Recording problem: {recording_db.station.name}",
+                                f"Recording '{os.path.basename(output_file)}' is {capture.stop_reason}, reconnecting."
+                            )
+                            capture.alerted = True
                         
-                        # Send the notification
-                        success, msg = send_pushover_notification(
-                            recording_db.user_id,
-                            title,
-                            message
-                        )
+                        recording_tracer.event(recording_id, 'restart', capture.stop_reason)
+                        capture.stop_reason = None
+                        capture.restarts += 1
+                        CAPTURE_RETRIES.inc(station=capture.station_name, reason='unhealthy')
+                        if (capture.fallback_url and station_url != capture.fallback_url and
+                                capture.restarts >= app.config['CAPTURE_FAILOVER_AFTER']):
+                            # Reconnecting didn't help, switch to the station's alternate stream
+                            app.logger.warning(f"Failing over capture {recording_id} to {capture.fallback_url}")
+                            station_url = capture.station_url = capture.fallback_url
+                            recording_tracer.event(recording_id, 'failover', station_url)
                         
-                        if success:
-                            app.logger.info(f"Pushover notification sent successfully")
-                        else:
-                            app.logger.warning(f"Failed to send Pushover notification: {msg}")
+                        if remaining_slot > 1:
+                            duration_seconds = max(1, min(duration_seconds - captured, remaining_slot))
+                            continue
                     
-                    success = True
-                else:
                     # Failure - log errors and retry
-                    error_msg = stderr.decode('utf-8', errors='replace')
+                    error_msg = '\n'.join(capture.recent_lines)
                     app.logger.error(f"Recording failed: {error_msg}")
                     retry_count += 1
                     
                     if retry_count < max_retries:
+                        # Segments already on disk are kept, so only record what is still missing
+                        duration_seconds = max(1, duration_seconds - captured)
+                        CAPTURE_RETRIES.inc(station=capture.station_name, reason='error')
+                        if (capture.fallback_url and station_url != capture.fallback_url and
+                                retry_count >= app.config['CAPTURE_FAILOVER_AFTER']):
+                            # The main stream keeps failing outright, try the alternate one
+                            app.logger.warning(f"Failing over capture {recording_id} to {capture.fallback_url}")
+                            station_url = capture.station_url = capture.fallback_url
+                            recording_tracer.event(recording_id, 'failover', station_url)
+                        recording_tracer.event(recording_id, 'retry', f"attempt {retry_count + 1}/{max_retries}: "
+                                               f"{capture.recent_lines[-1] if capture.recent_lines else 'ffmpeg failed'}")
                         app.logger.info(f"Retrying recording ({retry_count}/{max_retries})...")
                         time.sleep(5)  # Wait 5 seconds before retrying
                     else:
-                        # Max retries reached, update status to failed
-                        recording_db.status = 'failed'
+                        # Max retries reached, keep whatever audio was captured
+                        finalize_segments(output_file)
+                        
+                        # Update status to failed
+                        recording_db.status = RecordingStatus.FAILED
                         recording_db.end_time = datetime.now()
-                        recording_db.error_message = error_msg
+                        recording_db.error = error_msg
                         db.session.commit()
+                        CAPTURES.inc(station=capture.station_name, result='failed')
+                        recording_tracer.event(recording_id, 'failed', capture.recent_lines[-1] if capture.recent_lines else None)
                         
                         app.logger.error(f"Max retries reached, recording failed: {recording_id}")
             
@@ -604,13 +1754,161 @@ def record_audio(recording_id, station_url, output_file, duration_seconds):
                 
                 if retry_count >= max_retries:
                     # Max retries reached
-                    recording_db.status = 'failed'
+                    finalize_segments(output_file)
+                    recording_db.status = RecordingStatus.FAILED
                     recording_db.end_time = datetime.now()
-                    recording_db.error_message = str(e)
+                    recording_db.error = str(e)
                     db.session.commit()
+                    CAPTURES.inc(station=capture.station_name, result='failed')
+                    recording_tracer.event(recording_id, 'failed', str(e))
+                else:
+                    CAPTURE_RETRIES.inc(station=capture.station_name, reason='exception')
+                    recording_tracer.event(recording_id, 'retry', str(e))
+
+class RecordingSupervisor:
+    """Run live captures on a dedicated worker pool.
+
+    The scheduler only dispatches "start recording X" into the supervisor, so
+    its own executor threads are released straight away no matter how many
+    captures are live.
+    """
+
+    CHECK_INTERVAL = 2  # seconds between health checks of the live captures
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._executor = None
+        self._monitor_thread = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._active = {}  # recording_id -> CaptureState
 
-def schedule_recording_job(recording_id, station_url, output_file, start_time, duration_seconds, recurring=None):
-    """Schedule a recording job using the APScheduler."""
+    def submit(self, recording_id, station_url, output_file, duration_seconds, resume=False):
+        """Queue a capture; returns False if the recording is already being captured."""
+        with self._lock:
+            if recording_id in self._active:
+                app.logger.warning(f"Recording {recording_id} is already being captured, ignoring dispatch")
+                return False
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='recording'
+                )
+            if self._monitor_thread is None or not self._monitor_thread.is_alive():
+                self._stopping.clear()
+                self._monitor_thread = threading.Thread(target=self._monitor, name='recording-monitor', daemon=True)
+                self._monitor_thread.start()
+
+            capture = CaptureState(recording_id)
+            self._active[recording_id] = capture
+            if len(self._active) > self.max_workers:
+                app.logger.warning(f"{len(self._active)} captures requested but only {self.max_workers} workers available, "
+                                   f"recording {recording_id} will wait for a free worker")
+
+        self._executor.submit(self._run, capture, station_url, output_file, duration_seconds, resume)
+        return True
+
+    def _run(self, capture, station_url, output_file, duration_seconds, resume):
+        recording_id = capture.recording_id
+        try:
+            record_audio(recording_id, station_url, output_file, duration_seconds, capture=capture, resume=resume)
+        except Exception as e:
+            app.logger.exception(f"Unhandled error in capture {recording_id}: {str(e)}")
+        finally:
+            storage_manager.release(recording_id)
+            with self._lock:
+                self._active.pop(recording_id, None)
+
+    def _monitor(self):
+        """Kill unhealthy captures (stalled, too slow or silent), so record_audio restarts them.
+
+        A capture whose ffmpeg exits is noticed by record_audio itself the
+        moment its output closes; this catches the ones that hang or
+        record nothing useful instead.
+        """
+        while not self._stopping.wait(self.CHECK_INTERVAL):
+            with self._lock:
+                captures = list(self._active.values())
+            for capture in captures:
+                problem = capture.kill_if_unhealthy()
+                if problem:
+                    app.logger.warning(f"Capture {capture.recording_id} is unhealthy ({problem}), restarting it")
+
+    def is_active(self, recording_id):
+        with self._lock:
+            return recording_id in self._active
+
+    def get(self, recording_id):
+        """Return the live CaptureState of a recording, or None if it isn't being captured."""
+        with self._lock:
+            return self._active.get(recording_id)
+
+    def active_recordings(self):
+        """Return the IDs of the captures currently queued or running."""
+        with self._lock:
+            return list(self._active)
+
+    def capture_counts(self):
+        """Return the number of captures running and waiting for a worker"""
+        with self._lock:
+            captures = list(self._active.values())
+        running = sum(1 for capture in captures if capture.started_at)
+        return {('running',): running, ('queued',): len(captures) - running}
+
+    def shutdown(self, wait=True):
+        self._stopping.set()
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor:
+            executor.shutdown(wait=wait)
+
+recording_supervisor = RecordingSupervisor(app.config['MAX_CONCURRENT_RECORDINGS'])
+
+def dispatch_recording(recording_id, station_url, output_file, duration_seconds, resume=False):
+    """Scheduler entry point: hand the capture over to the recording supervisor.
+
+    resume is set when picking up a capture a restart interrupted.
+    """
+    app.logger.info(f"Dispatching recording {recording_id} to the recording supervisor")
+    if recording_supervisor.submit(recording_id, station_url, output_file, duration_seconds, resume):
+        recording_tracer.event(recording_id, 'dispatched',
+                               f"resuming, {duration_seconds}s capture" if resume else f"{duration_seconds}s capture")
+    else:
+        recording_tracer.event(recording_id, 'dispatch_ignored', "already being captured")
+
+class EarlyTrigger(BaseTrigger):
+    """Fires lead_seconds before each fire time of another trigger.
+
+    Lives at module level so the SQLAlchemy job store can pickle it.
+    """
+
+    def __init__(self, trigger, lead_seconds):
+        self.trigger = trigger
+        self.lead_seconds = lead_seconds
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        lead = timedelta(seconds=self.lead_seconds)
+        next_fire_time = self.trigger.get_next_fire_time(
+            previous_fire_time + lead if previous_fire_time else None, now + lead)
+        return next_fire_time - lead if next_fire_time else None
+
+    def __str__(self):
+        return f"{self.trigger}, {self.lead_seconds}s early"
+
+    def __repr__(self):
+        return f"<EarlyTrigger ({self.trigger!r}, lead_seconds={self.lead_seconds})>"
+
+def schedule_recording_job(recording_id, station_url, output_file, start_time, duration_seconds, recurring=None,
+                           pre_roll_seconds=0):
+    """Schedule a recording job using the APScheduler.
+
+    The job fires CAPTURE_WARMUP_SECONDS plus the pre-roll ahead of the
+    start, so the capture is connected by the time its audio begins.
+    """
+    lead_seconds = app.config['CAPTURE_WARMUP_SECONDS'] + (pre_roll_seconds or 0)
+    
     # Add verbose logging
     app.logger.info(f"Scheduling recording job: {recording_id}")
     app.logger.info(f"  - Station URL: {station_url}")
@@ -618,6 +1916,7 @@ def schedule_recording_job(recording_id, station_url, output_file, start_time, d
     app.logger.info(f"  - Start time: {start_time}")
     app.logger.info(f"  - Duration: {duration_seconds} seconds")
     app.logger.info(f"  - Recurring: {recurring}")
+    app.logger.info(f"  - Dispatched: {lead_seconds} seconds early")
     
     # Check if the job is already scheduled
     job = scheduler.get_job(recording_id)
@@ -632,34 +1931,41 @@ def schedule_recording_job(recording_id, station_url, output_file, start_time, d
         
         # Add the job with a cron trigger
         try:
+            trigger = CronTrigger(
+                minute=cron_parts[0],
+                hour=cron_parts[1],
+                day=cron_parts[2],
+                month=cron_parts[3],
+                day_of_week=cron_parts[4]
+            )
             job = scheduler.add_job(
-                record_audio,
-                trigger=CronTrigger(
-                    minute=cron_parts[0],
-                    hour=cron_parts[1],
-                    day=cron_parts[2],
-                    month=cron_parts[3],
-                    day_of_week=cron_parts[4]
-                ),
+                dispatch_recording,
+                trigger=EarlyTrigger(trigger, lead_seconds) if lead_seconds else trigger,
                 id=recording_id,
                 args=[recording_id, station_url, output_file, duration_seconds],
-                name=f"Recurring Recording {recording_id}"
+                name=f"Recurring Recording {recording_id}",
+                replace_existing=True  # Before the scheduler starts only pending jobs can be removed
             )
             app.logger.info(f"Successfully scheduled recurring job: {recording_id}")
+            recording_tracer.event(recording_id, 'scheduled', f"cron {recurring}")
         except Exception as e:
             app.logger.error(f"Failed to schedule recurring job: {e}")
     else:
         # Add the job with a date trigger (one-time)
         try:
+            # Straight away if the warm-up window has already begun
+            run_date = max(start_time - timedelta(seconds=lead_seconds), datetime.now())
             job = scheduler.add_job(
-                record_audio,
-                trigger=DateTrigger(run_date=start_time),
+                dispatch_recording,
+                trigger=DateTrigger(run_date=run_date),
                 id=recording_id,
                 args=[recording_id, station_url, output_file, duration_seconds],
-                name=f"Recording {recording_id}"
+                name=f"Recording {recording_id}",
+                replace_existing=True
             )
             app.logger.info(f"Successfully scheduled one-time job: {recording_id}")
-            app.logger.info(f"Job will run at: {start_time}")
+            recording_tracer.event(recording_id, 'scheduled', f"for {start_time}")
+            app.logger.info(f"Job will run at: {run_date}")
         except Exception as e:
             app.logger.error(f"Failed to schedule one-time job: {e}")
             
@@ -685,34 +1991,966 @@ def schedule_recording_job(recording_id, station_url, output_file, start_time, d
         app.logger.error(f"Job verification failed. No job found with ID: {recording_id}")
 
 # Add this function with your other utility functions
-def clean_up_old_recordings(podcast_uuid, max_recordings):
-    """Delete old recordings based on retention policy"""
-    if max_recordings <= 0:
-        return  # Keep all recordings
-        
-    # Get all episodes for this podcast, sorted by date (newest first)
-    episodes = Recording.query.filter(
+# Columns needed to delete a recording and account for its storage
+STORAGE_COLUMNS = (Recording.id, Recording.output_file, Recording.station_id,
+                   Recording.podcast_uuid, Recording.user_id, Recording.file_size,
+                   Recording.local_copy_method)
+
+def captured_in_place(recording):
+    """Whether the recording's file is its local storage copy.
+
+    Such a file belongs to the user's archive: deleting the recording leaves
+    it in place and it doesn't count towards the space recordings use.
+    """
+    return recording.local_copy_method == 'in_place'
+
+class FileDeleter:
+    """Delete recording files on a background thread.
+
+    Pruning removes the rows in one statement and hands the files over
+    here, so neither the caller nor the database transaction waits on the
+    filesystem.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def delete(self, paths):
+        paths = [path for path in paths if path]
+        if not paths:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='file-deleter', daemon=True)
+                self._thread.start()
+        for path in paths:
+            self._queue.put(path)
+
+    def wait(self):
+        """Block until every queued file has been deleted."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            path = self._queue.get()
+            try:
+                os.remove(path)
+                app.logger.info(f"Deleted old recording file: {path}")
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                app.logger.error(f"Error deleting file {path}: {e}")
+            # Drop segments of a capture that never got finalised
+            shutil.rmtree(segments_directory(path), ignore_errors=True)
+            self._queue.task_done()
+
+file_deleter = FileDeleter()
+
+def delete_recordings(recordings):
+    """Bulk-delete recording rows and queue their files for deletion.
+
+    recordings are rows with id, output_file, station_id, podcast_uuid,
+    user_id and file_size, as returned by a query over those columns.
+    """
+    if not recordings:
+        return
+    
+    # Remove the rows in bulk, a batch at a time to stay under SQLite's parameter limit
+    ids = [recording.id for recording in recordings]
+    paths = [recording.output_file for recording in recordings if not captured_in_place(recording)]
+    file_index.files_deleted(paths)
+    for start in range(0, len(ids), 500):
+        batch = ids[start:start + 500]
+        PostProcessingTask.query.filter(PostProcessingTask.recording_id.in_(batch)).delete(synchronize_session=False)
+        RecordingEvent.query.filter(RecordingEvent.recording_id.in_(batch)).delete(synchronize_session=False)
+        Recording.query.filter(Recording.id.in_(batch)).delete(synchronize_session=False)
+    db.session.commit()
+    
+    storage_manager.recordings_deleted(recordings)
+    file_deleter.delete(paths)
+    for podcast_uuid in {recording.podcast_uuid for recording in recordings if recording.podcast_uuid}:
+        podcast_feeds.invalidate(podcast_uuid)
+
+def clean_up_old_recordings(podcast_uuid, max_recordings=0, max_age_days=0, max_total_size_mb=0):
+    """Delete old recordings based on retention policy.
+
+    Episodes are pruned beyond the newest max_recordings, when older than
+    max_age_days, or once the newest episodes add up to more than
+    max_total_size_mb; 0 disables a limit. The newest episode is always
+    kept. Returns the number of episodes deleted.
+    """
+    if max_recordings <= 0 and max_age_days <= 0 and max_total_size_mb <= 0:
+        return 0  # Keep all recordings
+    
+    # Rank the podcast's episodes newest first, with the size of everything up to each one
+    newest_first = Recording.actual_start_time.desc()
+    episodes = db.session.query(
+        *STORAGE_COLUMNS,
+        Recording.actual_start_time,
+        db.func.row_number().over(order_by=newest_first).label('position'),
+        db.func.sum(db.func.coalesce(Recording.file_size, 0)).over(order_by=newest_first, rows=(None, 0)).label('total_size')
+    ).filter(
         Recording.podcast_uuid == podcast_uuid,
-        Recording.status.in_(['Completed', 'completed']),
+        Recording.status == RecordingStatus.COMPLETED,
         ~Recording.recurring.is_(None)  # Filter out the template
-    ).order_by(Recording.actual_start_time.desc()).all()
+    ).subquery()
     
-    # If we have more than the max, delete the oldest ones
-    if len(episodes) > max_recordings:
-        for episode in episodes[max_recordings:]:
-            # Delete the file if it exists
-            if episode.output_file and os.path.exists(episode.output_file):
-                try:
-                    os.remove(episode.output_file)
-                    app.logger.info(f"Deleted old recording file: {episode.output_file}")
-                except OSError as e:
-                    app.logger.error(f"Error deleting file {episode.output_file}: {e}")
+    limits = []
+    if max_recordings > 0:
+        limits.append(episodes.c.position > max_recordings)
+    if max_age_days > 0:
+        limits.append(episodes.c.actual_start_time < datetime.now() - timedelta(days=max_age_days))
+    if max_total_size_mb > 0:
+        limits.append(episodes.c.total_size > max_total_size_mb * 1024 * 1024)
+    
+    expired = db.session.query(*[episodes.c[column.key] for column in STORAGE_COLUMNS]).filter(
+        episodes.c.position > 1,
+        db.or_(*limits)
+    ).all()
+    if not expired:
+        return 0
+    
+    delete_recordings(expired)
+    app.logger.info(f"Deleted {len(expired)} old recording record(s) of podcast {podcast_uuid}")
+    return len(expired)
+
+class StorageManager:
+    """Keep track of the space recordings take and keep RECORDINGS_FOLDER from filling up.
+
+    Usage totals per station, podcast and user are kept in memory from
+    Recording.file_size: loaded with one GROUP BY query at start-up, updated
+    as captures complete and recordings are deleted, and reconciled with the
+    database every few minutes. Nothing walks the disk.
+
+    Capacity is STORAGE_QUOTA_MB when set, otherwise the filesystem holding
+    RECORDINGS_FOLDER. Above the high watermark the oldest episodes of
+    podcasts are evicted until usage is back under the low watermark. A
+    capture is only started if its projected size (the station's measured
+    bitrate × duration) fits, and its projected size is reserved until it ends.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.by_station = {}
+        self.by_podcast = {}
+        self.by_user = {}
+        self.total = 0
+        self._reservations = {}  # recording_id -> projected bytes
+
+    def refresh(self):
+        """Recompute the totals from the database."""
+        rows = db.session.query(
+            Recording.station_id,
+            Recording.podcast_uuid,
+            Recording.user_id,
+            db.func.sum(db.func.coalesce(Recording.file_size, 0))
+        ).filter(
+            Recording.status == RecordingStatus.COMPLETED,
+            Recording.local_copy_method.is_distinct_from('in_place')
+        ).group_by(Recording.station_id, Recording.podcast_uuid, Recording.user_id).all()
+        
+        with self._lock:
+            self.by_station, self.by_podcast, self.by_user, self.total = {}, {}, {}, 0
+            for station_id, podcast_uuid, user_id, size in rows:
+                self._add(station_id, podcast_uuid, user_id, size or 0)
+
+    def _add(self, station_id, podcast_uuid, user_id, size):
+        self.total += size
+        for totals, key in ((self.by_station, station_id), (self.by_podcast, podcast_uuid), (self.by_user, user_id)):
+            if key is not None:
+                totals[key] = totals.get(key, 0) + size
+
+    def recording_completed(self, recording, previous_size=0):
+        if captured_in_place(recording):
+            return
+        with self._lock:
+            self._add(recording.station_id, recording.podcast_uuid, recording.user_id,
+                      (recording.file_size or 0) - previous_size)
+
+    def recordings_deleted(self, recordings):
+        with self._lock:
+            for recording in recordings:
+                if captured_in_place(recording):
+                    continue
+                self._add(recording.station_id, recording.podcast_uuid, recording.user_id,
+                          -(recording.file_size or 0))
+
+    def usage(self):
+        """Return (used bytes including reservations, capacity bytes)"""
+        with self._lock:
+            reserved = sum(self._reservations.values())
+            tracked = self.total
+        
+        quota = app.config['STORAGE_QUOTA_MB'] * 1024 * 1024
+        if quota > 0:
+            return tracked + reserved, quota
+        
+        stat = os.statvfs(app.config['RECORDINGS_FOLDER'])
+        capacity = stat.f_blocks * stat.f_frsize
+        return capacity - stat.f_bavail * stat.f_frsize + reserved, capacity
+
+    def status(self):
+        used, capacity = self.usage()
+        with self._lock:
+            return {
+                'used_bytes': used,
+                'capacity_bytes': capacity,
+                'recordings_bytes': self.total,
+                'reserved_bytes': sum(self._reservations.values()),
+                'high_watermark': app.config['STORAGE_HIGH_WATERMARK'],
+                'low_watermark': app.config['STORAGE_LOW_WATERMARK'],
+                'by_station': dict(self.by_station),
+                'by_podcast': dict(self.by_podcast),
+                'by_user': dict(self.by_user)
+            }
+
+    def projected_size(self, station_id, duration_seconds):
+        """Estimate a capture's size from what the station's earlier recordings measured."""
+        size, duration = db.session.query(
+            db.func.sum(Recording.file_size),
+            db.func.sum(Recording.actual_duration_seconds)
+        ).filter(
+            Recording.station_id == station_id,
+            Recording.status == RecordingStatus.COMPLETED,
+            Recording.file_size > 0,
+            Recording.actual_duration_seconds > 0
+        ).one()
+        
+        if size and duration:
+            bytes_per_second = size / duration
+        else:
+            bytes_per_second = app.config['STORAGE_DEFAULT_BITRATE_KBPS'] * 1000 / 8
+        return int(bytes_per_second * duration_seconds)
+
+    def evict(self, bytes_needed):
+        """Delete the oldest evictable episodes until bytes_needed are freed; returns bytes freed.
+
+        Only completed podcast episodes are evicted, never the newest episode
+        of a podcast and never one with post-processing still to do.
+        """
+        busy = db.session.query(PostProcessingTask.id).filter(
+            PostProcessingTask.recording_id == Recording.id,
+            PostProcessingTask.status.in_(['pending', 'running'])
+        ).exists()
+        episodes = db.session.query(
+            *STORAGE_COLUMNS,
+            Recording.actual_start_time,
+            db.func.row_number().over(partition_by=Recording.podcast_uuid,
+                                      order_by=Recording.actual_start_time.desc()).label('position')
+        ).filter(
+            Recording.status == RecordingStatus.COMPLETED,
+            Recording.podcast_uuid.isnot(None),
+            Recording.local_copy_method.is_distinct_from('in_place'),  # Deleting those frees nothing here
+            ~busy
+        ).subquery()
+        
+        candidates = db.session.query(*[episodes.c[column.key] for column in STORAGE_COLUMNS]).filter(
+            episodes.c.position > 1
+        ).order_by(episodes.c.actual_start_time)
+        
+        evicted = []
+        freed = 0
+        for episode in candidates.yield_per(500):
+            if freed >= bytes_needed:
+                break
+            evicted.append(episode)
+            freed += episode.file_size or 0
+        
+        if evicted:
+            delete_recordings(evicted)
+            app.logger.warning(f"Storage above high watermark, evicted {len(evicted)} old episode(s) ({freed} bytes)")
+            if app.config['STORAGE_QUOTA_MB'] <= 0:
+                # The filesystem only shows the space once the files are gone
+                file_deleter.wait()
+        return freed
+
+    def enforce_watermarks(self, extra_bytes=0):
+        """Evict episodes if usage (plus extra_bytes) is above the high watermark; returns bytes freed."""
+        used, capacity = self.usage()
+        used += extra_bytes
+        if used <= capacity * app.config['STORAGE_HIGH_WATERMARK'] / 100:
+            return 0
+        return self.evict(used - capacity * app.config['STORAGE_LOW_WATERMARK'] / 100)
+
+    def admit(self, recording, duration_seconds):
+        """Reserve space for a capture; returns (success, message)."""
+        projected = self.projected_size(recording.station_id, duration_seconds)
+        self.enforce_watermarks(projected)
+        
+        used, capacity = self.usage()
+        if used + projected > capacity:
+            return False, (f"Not enough storage: capture needs about {projected // (1024 * 1024)} MB, "
+                           f"{max(0, capacity - used) // (1024 * 1024)} MB available")
+        
+        with self._lock:
+            self._reservations[recording.id] = projected
+        return True, f"Reserved {projected} bytes"
+
+    def release(self, recording_id):
+        with self._lock:
+            self._reservations.pop(recording_id, None)
+
+storage_manager = StorageManager()
+
+def check_storage():
+    """Scheduled job: reconcile the storage totals and enforce the watermarks."""
+    with app.app_context():
+        storage_manager.refresh()
+        storage_manager.enforce_watermarks()
+
+AUDIO_EXTENSIONS = ('.mp3', '.aac', '.m4a', '.ogg', '.opus')
+
+class FileIndex:
+    """Persistent index of the audio files in RECORDINGS_FOLDER.
+
+    Files are added as captures complete and removed as recordings are
+    deleted. A scheduled rescan catches everything else, but only lists the
+    directories whose mtime changed since they were last listed (adding or
+    removing a file changes it), so an unchanged archive costs one stat per
+    directory. Orphaned files are then a query on the index.
+    """
+
+    def _in_recordings_folder(self, path):
+        root = os.path.abspath(app.config['RECORDINGS_FOLDER'])
+        return bool(path) and os.path.abspath(path).startswith(root + os.sep)
+
+    def file_written(self, path, recording_id=None):
+        """Add or update a file in the index"""
+        if not self._in_recordings_folder(path) or not path.lower().endswith(AUDIO_EXTENSIONS):
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        db.session.merge(IndexedFile(path=path, directory=os.path.dirname(path), size=stat.st_size,
+                                     mtime=stat.st_mtime, recording_id=recording_id))
+        db.session.commit()
+
+    def files_deleted(self, paths):
+        """Drop files from the index (call before committing their deletion)"""
+        paths = [path for path in paths if path]
+        for start in range(0, len(paths), 500):
+            IndexedFile.query.filter(IndexedFile.path.in_(paths[start:start + 500])).delete(synchronize_session=False)
+
+    def rescan(self):
+        """Bring the index up to date, listing only directories that changed; returns the number listed."""
+        root = app.config['RECORDINGS_FOLDER']
+        known = {directory.path: directory for directory in IndexedDirectory.query.all()}
+        children = {}
+        for directory in known.values():
+            children.setdefault(directory.parent, []).append(directory.path)
+        
+        seen = set()
+        listed = 0
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            seen.add(directory)
+            
+            if directory in known and known[directory].mtime_ns == mtime_ns:
+                # Nothing added or removed here; its subdirectories may still have changed
+                pending.extend(children.get(directory, []))
+                continue
+            
+            files = {}
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        # Segments of a running capture come and go, skip them
+                        if not entry.name.endswith('.segments'):
+                            pending.append(entry.path)
+                    elif entry.name.lower().endswith(AUDIO_EXTENSIONS):
+                        stat = entry.stat()
+                        files[entry.path] = (stat.st_size, stat.st_mtime)
             
-            # Remove from database
-            db.session.delete(episode)
-            app.logger.info(f"Deleted old recording record: {episode.id}")
+            indexed = {row.path: row for row in IndexedFile.query.filter_by(directory=directory)}
+            self.files_deleted([path for path in indexed if path not in files])
+            for path, (size, mtime) in files.items():
+                row = indexed.get(path)
+                if row is None:
+                    db.session.add(IndexedFile(path=path, directory=directory, size=size, mtime=mtime))
+                elif row.size != size or row.mtime != mtime:
+                    row.size, row.mtime = size, mtime
             
+            db.session.merge(IndexedDirectory(path=directory, parent=None if directory == root else os.path.dirname(directory),
+                                              mtime_ns=mtime_ns))
+            db.session.commit()
+            listed += 1
+        
+        # Directories that disappeared take their files with them
+        gone = [path for path in known if path not in seen]
+        for start in range(0, len(gone), 500):
+            batch = gone[start:start + 500]
+            IndexedFile.query.filter(IndexedFile.directory.in_(batch)).delete(synchronize_session=False)
+            IndexedDirectory.query.filter(IndexedDirectory.path.in_(batch)).delete(synchronize_session=False)
         db.session.commit()
+        
+        self.reconcile()
+        return listed
+
+    def reconcile(self):
+        """Link every indexed file to the recording that owns it, in one statement.
+
+        Only rows whose owner changed are written, so the usual run is a read.
+        """
+        owner = db.session.query(Recording.id).filter(Recording.output_file == IndexedFile.path) \
+            .limit(1).scalar_subquery()
+        IndexedFile.query.filter(IndexedFile.recording_id.is_distinct_from(owner)) \
+            .update({'recording_id': owner}, synchronize_session=False)
+        db.session.commit()
+
+    def orphaned_files(self):
+        """Indexed files no recording points at, newest first"""
+        return IndexedFile.query.filter(IndexedFile.recording_id.is_(None)) \
+            .order_by(IndexedFile.mtime.desc()).all()
+
+file_index = FileIndex()
+
+def rescan_file_index():
+    """Scheduled job: pick up changes to RECORDINGS_FOLDER the file index didn't see."""
+    with app.app_context():
+        started = time.monotonic()
+        listed = file_index.rescan()
+        app.logger.info(f"File index rescan listed {listed} changed director{'y' if listed == 1 else 'ies'} "
+                        f"in {time.monotonic() - started:.2f}s")
+
+class StatsCache:
+    """Aggregate counts for /admin and /health, kept in memory instead of queried per request.
+
+    Station, user and per-status recording counts are loaded with one
+    GROUP BY at start-up and then follow the session: every flush records
+    the rows added, deleted or moved to another status, and the change is
+    applied when the transaction commits. Bulk statements on those tables
+    don't say what they changed, so they mark the counts stale and the next
+    read recounts.
+
+    The scheduler's jobs are mirrored from its listeners (added, modified,
+    removed, submitted), so nothing has to unpickle the job store to list
+    upcoming jobs. Executions, errors and misses are counted as well.
+    """
+
+    COUNTED = ('Recording', 'Station', 'User')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._stale = True
+        self._jobs = {}  # job id -> (name, next run time)
+        self.jobs_executed = 0
+        self.jobs_failed = 0
+        self.jobs_missed = 0
+
+    def refresh(self):
+        """Recount from the database and reload the job list."""
+        self.refresh_counts()
+        jobs = {job.id: (job.name, getattr(job, 'next_run_time', None)) for job in scheduler.get_jobs()}
+        with self._lock:
+            self._jobs = jobs
+
+    def refresh_counts(self):
+        counts = dict.fromkeys(RecordingStatus.ALL, 0)
+        counts.update(db.session.query(Recording.status, db.func.count()).group_by(Recording.status).all())
+        counts['stations'] = Station.query.count()
+        counts['users'] = User.query.count()
+        with self._lock:
+            self._counts = counts
+            self._stale = False
+
+    def counts(self):
+        """Return the current counts; recounts first if a bulk statement made them stale"""
+        if self._stale:
+            self.refresh_counts()
+        with self._lock:
+            return dict(self._counts)
+
+    def apply(self, changes):
+        with self._lock:
+            for key, delta in changes.items():
+                self._counts[key] = self._counts.get(key, 0) + delta
+
+    def invalidate(self):
+        self._stale = True
+
+    # Session listeners
+
+    def after_flush(self, session, flush_context):
+        changes = session.info.setdefault('stats_changes', {})
+
+        def count(instance, delta, status=None):
+            if isinstance(instance, Recording):
+                key = status or instance.status
+            elif isinstance(instance, Station):
+                key = 'stations'
+            elif isinstance(instance, User):
+                key = 'users'
+            else:
+                return
+            changes[key] = changes.get(key, 0) + delta
+
+        for instance in session.new:
+            count(instance, 1)
+        for instance in session.deleted:
+            if isinstance(instance, Recording):
+                history = db.inspect(instance).attrs.status.history
+                count(instance, -1, history.deleted[0] if history.deleted else instance.status)
+            else:
+                count(instance, -1)
+        for instance in session.dirty:
+            if not isinstance(instance, Recording) or instance in session.deleted:
+                continue
+            history = db.inspect(instance).attrs.status.history
+            if history.added and history.deleted and history.added[0] != history.deleted[0]:
+                count(instance, -1, history.deleted[0])
+                count(instance, 1, history.added[0])
+            elif history.added and not history.deleted:
+                # Old status wasn't loaded, so there's no telling what it was
+                session.info['stats_stale'] = True
+
+    def after_bulk(self, orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            if any(mapper.class_.__name__ in self.COUNTED for mapper in orm_execute_state.all_mappers):
+                orm_execute_state.session.info['stats_stale'] = True
+
+    def after_commit(self, session):
+        changes = session.info.pop('stats_changes', None)
+        if session.info.pop('stats_stale', False):
+            self.invalidate()
+        elif changes:
+            self.apply(changes)
+
+    def after_rollback(self, session):
+        session.info.pop('stats_changes', None)
+        session.info.pop('stats_stale', None)
+
+    # Scheduler listeners
+
+    def job_event(self, event):
+        from apscheduler.events import (EVENT_JOB_ADDED, EVENT_JOB_MODIFIED, EVENT_JOB_SUBMITTED,
+                                        EVENT_JOB_REMOVED, EVENT_ALL_JOBS_REMOVED, EVENT_JOB_EXECUTED,
+                                        EVENT_JOB_ERROR, EVENT_JOB_MISSED)
+        if event.code == EVENT_ALL_JOBS_REMOVED:
+            with self._lock:
+                self._jobs = {}
+        elif event.code == EVENT_JOB_REMOVED:
+            with self._lock:
+                self._jobs.pop(event.job_id, None)
+        elif event.code in (EVENT_JOB_ADDED, EVENT_JOB_MODIFIED, EVENT_JOB_SUBMITTED):
+            # A submitted job that is still known got a new next run time (run-once jobs are removed first)
+            if event.code == EVENT_JOB_SUBMITTED and event.job_id not in self._jobs:
+                return
+            job = scheduler.get_job(event.job_id, event.jobstore)  # one row, only when the job changes
+            with self._lock:
+                if job:
+                    self._jobs[job.id] = (job.name, getattr(job, 'next_run_time', None))
+                else:
+                    self._jobs.pop(event.job_id, None)
+        elif event.code == EVENT_JOB_EXECUTED:
+            self.jobs_executed += 1
+        elif event.code == EVENT_JOB_ERROR:
+            self.jobs_failed += 1
+        elif event.code == EVENT_JOB_MISSED:
+            self.jobs_missed += 1
+
+    def due_jobs_count(self):
+        """Jobs whose run time has passed but that the scheduler hasn't submitted yet"""
+        now = datetime.now().astimezone()
+        with self._lock:
+            return sum(1 for _, next_run in self._jobs.values() if next_run and next_run <= now)
+
+    def job_name(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job[0] if job else None
+
+    def jobs_count(self):
+        with self._lock:
+            return len(self._jobs)
+
+    def upcoming_jobs(self, limit=5):
+        with self._lock:
+            jobs = [(job_id, name, next_run) for job_id, (name, next_run) in self._jobs.items() if next_run]
+        return [{'id': job_id, 'name': name, 'next_run': next_run.isoformat()}
+                for job_id, name, next_run in heapq.nsmallest(limit, jobs, key=lambda job: job[2])]
+
+stats_cache = StatsCache()
+sqlalchemy.event.listen(db.session, 'after_flush', stats_cache.after_flush)
+sqlalchemy.event.listen(db.session, 'do_orm_execute', stats_cache.after_bulk)
+sqlalchemy.event.listen(db.session, 'after_commit', stats_cache.after_commit)
+sqlalchemy.event.listen(db.session, 'after_rollback', stats_cache.after_rollback)
+
+def recording_folder_structure(recording):
+    """Return the [Station Name]/YYYY/M-MMM subfolders used for structured storage"""
+    started = recording.actual_start_time or recording.start_time or datetime.now()
+    year_folder = started.strftime('%Y')
+    month_folder = started.strftime('%-m-%b')  # 3-Mar format
+    return recording.station.name, year_folder, month_folder
+
+def local_storage_directory(recording):
+    """Return the local storage folder a recording is placed in"""
+    # Get local folder from recording
+    local_folder = recording.local_folder
+    
+    # If no folder specified in recording, try to get from user settings
+    if not local_folder and recording.user_id:
+        user_settings = UserSettings.query.filter_by(user_id=recording.user_id).first()
+        if user_settings:
+            local_folder = user_settings.local_storage_path
+    
+    # Fall back to default folder if needed
+    if not local_folder:
+        # Use a default location under recordings folder
+        local_folder = os.path.join(app.config['RECORDINGS_FOLDER'], 'local_storage')
+        app.logger.info(f"Using default local folder: {local_folder}")
+    
+    if recording.create_folder_structure:
+        # Create folder structure: [Base Path]/[Station Name]/YYYY/MM-MMM/
+        return os.path.join(local_folder, *recording_folder_structure(recording))
+    return local_folder
+
+FICLONE = 0x40049409  # ioctl from linux/fs.h
+
+def place_file(source, destination):
+    """Make destination a copy of source, as cheaply as the filesystems allow.
+
+    Tries a hard link first (no data written at all), then a reflink clone
+    (FICLONE, shared extents on Btrfs/XFS), then an in-kernel copy_file_range,
+    and only then streams the bytes. Returns the method used. A hard link
+    shares the file with the recording, so an append to the recording (a
+    resumed capture) shows up in the copy as well.
+    """
+    if os.path.exists(destination):
+        if os.path.samefile(source, destination):
+            # Captured straight into local storage, or linked by an earlier attempt
+            return 'in_place' if os.path.abspath(source) == os.path.abspath(destination) else 'hardlink'
+        os.remove(destination)
+    
+    try:
+        os.link(source, destination)
+        return 'hardlink'
+    except OSError:
+        pass  # Other filesystem, or links not supported
+    
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            method = 'reflink'
+        except OSError:
+            method = 'copy'
+            if hasattr(os, 'copy_file_range'):
+                try:
+                    while os.copy_file_range(src.fileno(), dst.fileno(), 1024 * 1024 * 1024):
+                        pass
+                    method = 'copy_file_range'
+                except OSError:
+                    # Start over with a plain copy
+                    src.seek(0)
+                    dst.seek(0)
+                    dst.truncate()
+            if method == 'copy':
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+    shutil.copystat(source, destination)
+    return method
+
+def store_local_copy(recording, task):
+    """Post-processing stage: place a completed recording in the local storage folder"""
+    local_path = local_storage_directory(recording)
+    
+    try:
+        os.makedirs(local_path, exist_ok=True)
+        local_file_path = os.path.join(local_path, os.path.basename(task.file_path))
+        method = place_file(task.file_path, local_file_path)
+    except Exception as e:
+        recording.local_status = 'failed'
+        recording.local_error = str(e)
+        return False, f"Local storage copy failed: {str(e)}"
+    
+    recording.local_status = 'success'
+    recording.local_error = None
+    recording.local_copy_method = method
+    return True, f"Local copy created at: {local_file_path} ({method})"
+
+def upload_recording_to_nextcloud(recording, task):
+    """Post-processing stage: upload a completed recording to the user's Nextcloud"""
+    user_settings = UserSettings.query.filter_by(user_id=recording.user_id).first() if recording.user_id else None
+    
+    if not (user_settings and user_settings.nextcloud_url and user_settings.nextcloud_username and user_settings.nextcloud_password):
+        # Nothing to retry until the user configures Nextcloud
+        recording.nextcloud_status = 'Failed'
+        recording.nextcloud_error = 'Nextcloud is not configured'
+        return True, "Nextcloud is not configured, skipping upload"
+    
+    # Determine remote path
+    remote_path = recording.nextcloud_folder or '/Recordings/'
+    if not remote_path.endswith('/'):
+        remote_path += '/'
+    
+    # Create folder structure if enabled: [Base Path]/[Station Name]/YYYY/MM-MMM/
+    if recording.nextcloud_create_folder_structure:
+        remote_path += '/'.join(recording_folder_structure(recording)) + '/'
+    
+    remote_path += os.path.basename(task.file_path)
+    
+    success, message = upload_to_nextcloud(
+        task.file_path,
+        remote_path,
+        user_settings.nextcloud_url,
+        user_settings.nextcloud_username,
+        user_settings.nextcloud_password
+    )
+    
+    if success:
+        recording.nextcloud_status = 'Uploaded'
+        recording.nextcloud_error = None
+    else:
+        recording.nextcloud_status = 'Failed'
+        recording.nextcloud_error = message
+    return success, message
+
+def apply_retention_policy(recording, task):
+    """Post-processing stage: enforce the podcast's retention limits"""
+    deleted = clean_up_old_recordings(recording.podcast_uuid, recording.max_recordings or 0,
+                                      recording.max_age_days or 0, recording.max_total_size_mb or 0)
+    return True, f"Retention policy applied to podcast {recording.podcast_uuid}, {deleted} episode(s) deleted"
+
+def notify_recording_complete(recording, task):
+    """Post-processing stage: send the Pushover notification for a completed recording"""
+    user_settings = UserSettings.query.filter_by(user_id=recording.user_id).first()
+    if not (user_settings and user_settings.pushover_enabled and
+            user_settings.pushover_api_token and user_settings.pushover_user_key):
+        # Nothing to retry until the user configures Pushover
+        return True, "Pushover is not configured, skipping notification"
+    
+    # Actual recording duration as measured when the capture finished
+    actual_duration = recording.actual_duration_seconds or recording.duration_seconds
+    
+    # Format the duration nicely
+    minutes, seconds = divmod(int(actual_duration), 60)
+    hours, minutes = divmod(minutes, 60)
+    
+    if hours > 0:
+        duration_str = f"{hours}h {minutes}m {seconds}s"
+    else:
+        duration_str = f"{minutes}m {seconds}s"
+    
+    # Create notification message
+    title = f"Recording Complete: {recording.station.name}"
+    message = f"Recording '{os.path.basename(task.file_path)}' completed successfully.\n"
+    message += f"Duration: {duration_str}"
+    
+    # Include file size if available
+    if recording.file_size:
+        file_size_mb = recording.file_size / (1024 * 1024)
+        message += f"\nSize: {file_size_mb:.2f} MB"
+    
+    # Completions close together are merged into one notification per user. The stage
+    # stays running until the dispatcher reports whether Pushover took the message.
+    pushover_dispatcher.notify(
+        user_settings.pushover_api_token,
+        user_settings.pushover_user_key,
+        title,
+        message,
+        batch_title="{count} recordings completed",
+        summary=f"{recording.station.name}: {os.path.basename(task.file_path)} ({duration_str})",
+        on_sent=partial(post_processor.stage_finished, task.id)
+    )
+    return None, "Notification queued"
+
+class PostProcessor:
+    """Run the post-processing stages of completed recordings.
+
+    Stages are queued in the post_processing_task table, so they survive a
+    restart. Every stage has its own worker threads: a slow Nextcloud server
+    only holds up other uploads, and the stages of different recordings run
+    in parallel. A failed stage is retried with exponential backoff.
+    
+    A handler returns (success, message), or (None, message) when the work
+    finishes in the background; it then reports through stage_finished and
+    the task stays running until it does.
+    """
+
+    # Stage name -> (handler, whether the recording needs it)
+    STAGES = OrderedDict([
+        ('local_copy', (store_local_copy, lambda r: r.save_to_local)),
+        ('nextcloud', (upload_recording_to_nextcloud, lambda r: r.save_to_nextcloud)),
+        ('retention', (apply_retention_policy, lambda r: r.podcast_uuid and (
+            (r.max_recordings or 0) > 0 or (r.max_age_days or 0) > 0 or (r.max_total_size_mb or 0) > 0))),
+        ('pushover', (notify_recording_complete, lambda r: r.pushover_enabled and r.user_id)),
+    ])
+
+    RETRY_DELAY = 30  # seconds, doubled on every attempt
+    MAX_RETRY_DELAY = 3600
+    POLL_INTERVAL = 10
+
+    def __init__(self, workers_per_stage, max_attempts):
+        self.workers_per_stage = workers_per_stage
+        self.max_attempts = max_attempts
+        self._wakeups = {stage: threading.Event() for stage in self.STAGES}
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Requeue tasks interrupted by a shutdown and start the stage workers."""
+        if self._threads:
+            return
+        
+        interrupted = PostProcessingTask.query.filter_by(status='running').update(
+            {'status': 'pending', 'next_attempt_at': datetime.now()}, synchronize_session=False)
+        db.session.commit()
+        if interrupted:
+            app.logger.info(f"Requeued {interrupted} interrupted post-processing task(s)")
+        
+        self._stopping.clear()
+        for stage in self.STAGES:
+            for i in range(self.workers_per_stage):
+                thread = threading.Thread(target=self._work, args=(stage,),
+                                          name=f"post-{stage}-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        for event in self._wakeups.values():
+            event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def enqueue(self, recording):
+        """Queue the stages a completed recording needs; returns the queued stage names."""
+        # A recurring recording reuses its row. Finished tasks of earlier runs are dropped,
+        # unfinished ones keep working on their own run's file.
+        for task in list(recording.post_processing_tasks):
+            if task.status in ('done', 'failed') or (task.status == 'pending' and task.file_path == recording.output_file):
+                recording.post_processing_tasks.remove(task)
+        
+        stages = [stage for stage, (_, wanted) in self.STAGES.items() if wanted(recording)]
+        for stage in stages:
+            recording.post_processing_tasks.append(PostProcessingTask(
+                stage=stage, file_path=recording.output_file, next_attempt_at=datetime.now()))
+        if recording.save_to_local:
+            recording.local_status = 'pending'
+        if recording.save_to_nextcloud:
+            recording.nextcloud_status = 'pending'
+        db.session.commit()
+        
+        app.logger.info(f"Queued post-processing for recording {recording.id}: {', '.join(stages) or 'nothing to do'}")
+        for stage in stages:
+            self._wakeups[stage].set()
+        return stages
+
+    def _claim(self, stage):
+        """Atomically take the next due task of a stage; returns it or None."""
+        now = datetime.now()
+        candidates = db.session.query(PostProcessingTask.id).filter(
+            PostProcessingTask.stage == stage,
+            PostProcessingTask.status == 'pending',
+            PostProcessingTask.next_attempt_at <= now
+        ).order_by(PostProcessingTask.next_attempt_at).limit(self.workers_per_stage + 1).all()
+        
+        for (task_id,) in candidates:
+            # Only one worker wins the update, even across processes
+            claimed = PostProcessingTask.query.filter_by(id=task_id, status='pending').update({
+                'status': 'running',
+                'started_at': now,
+                'attempts': PostProcessingTask.attempts + 1
+            }, synchronize_session=False)
+            db.session.commit()
+            if claimed:
+                return db.session.get(PostProcessingTask, task_id)
+        return None
+
+    def _work(self, stage):
+        wakeup = self._wakeups[stage]
+        while not self._stopping.is_set():
+            try:
+                with app.app_context():
+                    task = self._claim(stage)
+                    if task:
+                        self._run(task)
+                        continue
+            except Exception as e:
+                app.logger.exception(f"Post-processing worker for {stage} failed: {str(e)}")
+            
+            wakeup.wait(self.POLL_INTERVAL)
+            wakeup.clear()
+
+    def _run(self, task):
+        handler, _ = self.STAGES[task.stage]
+        recording = task.recording
+        started = time.monotonic()
+        
+        if not task.file_path:
+            task.file_path = recording.output_file  # Queued before tasks kept their file
+        
+        try:
+            if not task.file_path or not os.path.exists(task.file_path):
+                success, message = False, f"Recording file not found: {task.file_path}"
+            else:
+                success, message = handler(recording, task)
+        except Exception as e:
+            db.session.rollback()
+            app.logger.exception(f"Post-processing stage {task.stage} raised for recording {task.recording_id}")
+            success, message = False, str(e)
+        
+        task = db.session.get(PostProcessingTask, task.id)
+        if task is None or success is None:
+            # The recording was deleted while the stage ran (e.g. by retention), or the
+            # stage is still in flight; a restart requeues the running task
+            db.session.commit()
+            return
+        self._finish(task, success, message, time.monotonic() - started)
+
+    def stage_finished(self, task_id, success, message, retry_at=None):
+        """Record the result of a stage that finished in the background.
+
+        With retry_at the stage is tried again then, without using up an
+        attempt (e.g. Pushover is out of messages until its reset).
+        """
+        with app.app_context():
+            task = db.session.get(PostProcessingTask, task_id)
+            if task is None or task.status != 'running':
+                return  # Deleted along with its recording
+            self._finish(task, success, message, (datetime.now() - task.started_at).total_seconds(), retry_at)
+
+    def _finish(self, task, success, message, duration_seconds, retry_at=None):
+        task.finished_at = datetime.now()
+        task.duration_seconds = duration_seconds
+        result = 'done' if success else 'retry' if retry_at or task.attempts < self.max_attempts else 'failed'
+        POST_PROCESSING_SECONDS.observe(task.duration_seconds, stage=task.stage, result=result)
+        recording_tracer.event(task.recording_id, task.stage, f"{result}: {message}",
+                               duration_seconds=task.duration_seconds, at=task.started_at)
+        if success:
+            task.status = 'done'
+            task.last_error = None
+            app.logger.info(f"Post-processing {task.stage} done for recording {task.recording_id}: {message}")
+        elif retry_at:
+            task.status = 'pending'
+            task.attempts -= 1
+            task.last_error = message
+            task.next_attempt_at = retry_at
+            app.logger.warning(f"Post-processing {task.stage} deferred for recording {task.recording_id} "
+                               f"until {retry_at}: {message}")
+        elif task.attempts >= self.max_attempts:
+            task.status = 'failed'
+            task.last_error = message
+            app.logger.error(f"Post-processing {task.stage} failed for recording {task.recording_id} "
+                             f"after {task.attempts} attempts: {message}")
+        else:
+            delay = min(self.RETRY_DELAY * 2 ** (task.attempts - 1), self.MAX_RETRY_DELAY)
+            task.status = 'pending'
+            task.last_error = message
+            task.next_attempt_at = datetime.now() + timedelta(seconds=delay)
+            app.logger.warning(f"Post-processing {task.stage} failed for recording {task.recording_id} "
+                               f"(attempt {task.attempts}/{self.max_attempts}), retrying in {delay}s: {message}")
+        db.session.commit()
+
+post_processor = PostProcessor(app.config['POST_PROCESSING_WORKERS'], app.config['POST_PROCESSING_MAX_ATTEMPTS'])
 
 # Add this as a custom template filter near the top of your app.py file
 @app.template_filter('format_datetime')
@@ -751,12 +2989,23 @@ def add_station():
     
     if name and url:
         # Add to database
-        station = Station(name=name, url=url)
+        station = Station(name=name, url=url, fallback_url=request.form.get('fallback_url') or None)
         db.session.add(station)
         db.session.commit()
     
     return redirect(url_for('index'))
 
+@app.route('/edit_station/<int:station_id>', methods=['POST'])
+@login_required
+def edit_station(station_id):
+    station = db.session.get(Station, station_id)
+    
+    if station:
+        station.fallback_url = request.form.get('fallback_url') or None
+        db.session.commit()
+    
+    return redirect(url_for('index'))
+
 @app.route('/delete_station/<int:station_id>', methods=['GET', 'POST'])
 @login_required
 def delete_station(station_id):
@@ -843,7 +3092,7 @@ def schedule_recording():
             duration_minutes=duration,
             duration_seconds=duration * 60,
             output_file=output_path,
-            status='scheduled',
+            status=RecordingStatus.SCHEDULED,
             created_at=datetime.now()
         )
         
@@ -881,14 +3130,37 @@ def schedule_recording():
                 relative_path = os.path.join('images', img_filename)
                 recording.podcast_image = relative_path
         
-        # Add this in the schedule_recording route, before adding to the database
-        # Add retention setting
-        if recurring:
+        # Add this in the schedule_recording route, before adding to the database
+        # Add retention setting
+        if recurring:
+            try:
+                max_recordings = int(request.form.get('max_recordings', 0))
+                recording.max_recordings = max(0, max_recordings)  # Ensure non-negative
+            except (ValueError, TypeError):
+                recording.max_recordings = 0  # Default to keeping all
+            
+            try:
+                recording.max_age_days = max(0, int(request.form.get('max_age_days', 0)))
+            except (ValueError, TypeError):
+                recording.max_age_days = 0
+            
+            try:
+                recording.max_total_size_mb = max(0, int(request.form.get('max_total_size_mb', 0)))
+            except (ValueError, TypeError):
+                recording.max_total_size_mb = 0
+            
+            try:
+                feed_max_episodes = int(request.form.get('feed_max_episodes', 0))
+                recording.feed_max_episodes = max(0, feed_max_episodes)
+            except (ValueError, TypeError):
+                recording.feed_max_episodes = 0  # Default to publishing all
+        
+        # Capture window around the slot
+        for field in ('pre_roll_seconds', 'post_roll_seconds'):
             try:
-                max_recordings = int(request.form.get('max_recordings', 0))
-                recording.max_recordings = max(0, max_recordings)  # Ensure non-negative
+                setattr(recording, field, min(600, max(0, int(request.form.get(field, 0)))))
             except (ValueError, TypeError):
-                recording.max_recordings = 0  # Default to keeping all
+                setattr(recording, field, 0)
         
         # Process Nextcloud options 
         save_to_nextcloud = request.form.get('save_to_nextcloud') == 'on'
@@ -920,7 +3192,8 @@ def schedule_recording():
             output_path,
             start_datetime,
             duration * 60,
-            recurring
+            recurring,
+            recording.pre_roll_seconds
         )
         
         return redirect(url_for('recordings'))
@@ -928,31 +3201,180 @@ def schedule_recording():
     except ValueError as e:
         return f"Invalid date or time format: {e}", 400
 
+# Columns the recordings page and /api/recordings show; nothing else is loaded
+RECORDING_LIST_COLUMNS = (
+    Recording.id, Recording.station_id, Recording.user_id, Recording.start_time, Recording.end_time,
+    Recording.actual_start_time, Recording.duration_minutes, Recording.duration_seconds,
+    Recording.status, Recording.recurring, Recording.file_size, Recording.is_podcast,
+    Recording.podcast_title,
+)
+
+def encode_cursor(value, recording_id):
+    """Opaque cursor pointing just after the row with this sort value and id"""
+    payload = json.dumps([value.isoformat() if value else None, recording_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Return (sort value, id) of a cursor, or None if it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        value, recording_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return (datetime.fromisoformat(value) if value else None), str(recording_id)
+    except (ValueError, TypeError):
+        return None
+
+def recording_list_query():
+    """Recordings the current user may see, loading only RECORDING_LIST_COLUMNS and the station name"""
+    query = Recording.query.options(
+        db.load_only(*RECORDING_LIST_COLUMNS),
+        db.joinedload(Recording.station).load_only(Station.name)
+    )
+    if not current_user.is_admin:
+        query = query.filter(Recording.user_id == current_user.id)
+    return query
+
+def recording_page(query, sort_column, statuses, cursor=None, limit=None, descending=True):
+    """Fetch one page of recordings with these statuses ordered by (sort_column, id), starting after the cursor.
+
+    Keyset pagination: the cursor is the sort value and id of the last row of
+    the previous page, so every page costs the same however deep it is.
+    Each status is read with its own index range scan and the results are
+    merged, as a single query with status IN (...) would have to sort every
+    matching row. Rows without a sort value come last. Returns
+    (recordings, next cursor or None).
+    """
+    limit = max(1, limit or app.config['RECORDINGS_PAGE_SIZE'])
+    position = decode_cursor(cursor)
+    if position:
+        value, last_id = position
+        after_id = Recording.id < last_id if descending else Recording.id > last_id
+        if value is None:
+            query = query.filter(sort_column.is_(None), after_id)
+        else:
+            after_value = sort_column < value if descending else sort_column > value
+            query = query.filter(db.or_(after_value, db.and_(sort_column == value, after_id),
+                                        sort_column.is_(None)))
+    
+    if descending:
+        order = [sort_column.desc().nulls_last(), Recording.id.desc()]
+    else:
+        order = [sort_column.asc().nulls_last(), Recording.id.asc()]
+    # One extra row tells whether there is a next page
+    rows = []
+    for status in statuses:
+        rows.extend(query.filter(Recording.status == status).order_by(*order).limit(limit + 1).all())
+    
+    if len(statuses) > 1:
+        def sort_key(recording):
+            value = getattr(recording, sort_column.key)
+            return (value is None) != descending, value or datetime.min, recording.id
+        rows.sort(key=sort_key, reverse=descending)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(getattr(rows[-1], sort_column.key), rows[-1].id)
+
+def recording_counts(query):
+    """Number of recordings per status, counted in the database"""
+    counts = dict.fromkeys(RecordingStatus.ALL, 0)
+    rows = query.with_entities(Recording.status, db.func.count()).group_by(Recording.status).all()
+    for status, count in rows:
+        counts[status] = count
+    return counts
+
 @app.route('/recordings')
 @login_required
 def recordings():
-    # Get current user's recordings or all recordings for admin
-    query = Recording.query.options(db.joinedload(Recording.station))
+    # Current user's recordings or all recordings for admin, one page at a time
+    query = Recording.query
     if not current_user.is_admin:
-        query = query.filter_by(user_id=current_user.id)
+        query = query.filter(Recording.user_id == current_user.id)
+    counts = recording_counts(query)
     
-    # Get past recordings (already completed)
-    past_recordings = query.filter(
-        Recording.status.in_(['completed', 'Completed', 'failed', 'Failed'])
-    ).order_by(Recording.end_time.desc()).all()
+    # Past recordings (completed or failed), newest first
+    past_recordings, past_next = recording_page(
+        recording_list_query(), Recording.end_time, [RecordingStatus.COMPLETED, RecordingStatus.FAILED],
+        cursor=request.args.get('past')
+    )
     
-    # Get upcoming recordings (scheduled for the future)
-    upcoming_recordings = query.filter(
-        Recording.status.in_(['scheduled', 'Scheduled'])
-    ).order_by(Recording.start_time.asc()).all()
+    # Upcoming recordings (scheduled for the future), soonest first
+    upcoming_recordings, upcoming_next = recording_page(
+        recording_list_query(), Recording.start_time, [RecordingStatus.SCHEDULED],
+        cursor=request.args.get('upcoming'), descending=False
+    )
     
     return render_template(
         'recordings.html',
         past_recordings=past_recordings,
         upcoming_recordings=upcoming_recordings,
+        past_next=past_next,
+        upcoming_next=upcoming_next,
+        counts=counts,
+        tab='past' if 'past' in request.args else 'upcoming',
         title='Your Recordings'
     )
 
+@app.route('/api/recordings')
+@login_required
+def api_recordings():
+    """Recordings as JSON, for infinite scroll and filtering.
+
+    Filters: status (comma separated), station_id, from and to (ISO dates,
+    on the start time). Ordered by start time, newest first unless
+    order=asc; pass the returned next_cursor as cursor for the next page.
+    counts holds the number of matching recordings per status.
+    """
+    query = Recording.query
+    if not current_user.is_admin:
+        query = query.filter(Recording.user_id == current_user.id)
+    
+    try:
+        if request.args.get('station_id'):
+            query = query.filter(Recording.station_id == int(request.args['station_id']))
+        if request.args.get('from'):
+            query = query.filter(Recording.start_time >= datetime.fromisoformat(request.args['from']))
+        if request.args.get('to'):
+            query = query.filter(Recording.start_time < datetime.fromisoformat(request.args['to']))
+        limit = min(int(request.args.get('limit', app.config['RECORDINGS_PAGE_SIZE'])), 500)
+    except ValueError as e:
+        return {'error': f"Invalid filter: {e}"}, 400
+    if request.args.get('cursor') and not decode_cursor(request.args['cursor']):
+        return {'error': 'Invalid cursor'}, 400
+    
+    # Counts ignore the status filter so they can label filter buttons
+    counts = recording_counts(query)
+    
+    statuses = [status for status in request.args.get('status', '').lower().split(',') if status]
+    if any(status not in RecordingStatus.ALL for status in statuses):
+        return {'error': f"Unknown status, expected one of {', '.join(RecordingStatus.ALL)}"}, 400
+    
+    page, next_cursor = recording_page(
+        query.options(db.load_only(*RECORDING_LIST_COLUMNS),
+                      db.joinedload(Recording.station).load_only(Station.name)),
+        Recording.start_time, list(dict.fromkeys(statuses)) or RecordingStatus.ALL,
+        cursor=request.args.get('cursor'), limit=limit,
+        descending=request.args.get('order', 'desc') != 'asc'
+    )
+    
+    return {
+        'recordings': [{
+            'id': recording.id,
+            'station_id': recording.station_id,
+            'station_name': recording.station.name if recording.station else None,
+            'start_time': recording.start_time.isoformat() if recording.start_time else None,
+            'end_time': recording.end_time.isoformat() if recording.end_time else None,
+            'actual_start_time': recording.actual_start_time.isoformat() if recording.actual_start_time else None,
+            'duration_minutes': recording.duration_minutes,
+            'status': recording.status,
+            'recurring': recording.recurring,
+            'file_size': recording.file_size,
+            'podcast_title': recording.podcast_title if recording.is_podcast else None,
+        } for recording in page],
+        'next_cursor': next_cursor,
+        'counts': counts
+    }
+
 @app.route('/delete_recording/<recording_id>')
 @login_required
 def delete_recording(recording_id):
@@ -965,61 +3387,177 @@ def delete_recording(recording_id):
         if job:
             job.remove()
         
-        # Delete the output file if it exists and not a recurring template
-        if os.path.exists(recording.output_file) and recording.status != 'scheduled':
+        # Delete the output file if it exists and not a recurring template, or the user's local copy
+        if (os.path.exists(recording.output_file) and recording.status != RecordingStatus.SCHEDULED
+                and not captured_in_place(recording)):
             try:
                 os.remove(recording.output_file)
             except OSError as e:
                 print(f"Error deleting file: {e}")
         
+        # Drop segments of a capture that never got finalised
+        if recording.output_file:
+            shutil.rmtree(segments_directory(recording.output_file), ignore_errors=True)
+        
         # Remove from database
+        if not captured_in_place(recording):
+            file_index.files_deleted([recording.output_file])
         db.session.delete(recording)
         db.session.commit()
+        if recording.status == RecordingStatus.COMPLETED:
+            storage_manager.recordings_deleted([recording])
+        
+        if recording.podcast_uuid:
+            podcast_feeds.invalidate(recording.podcast_uuid)
     
     return redirect(url_for('recordings'))
 
+def send_recording_file(recording, as_attachment=False):
+    """Serve a recording file with byte ranges and conditional requests.
+
+    Range/If-Range (206), If-None-Match/If-Modified-Since (304) and
+    Accept-Ranges are handled by send_file using a strong ETag built from
+    the file's size and mtime. When X_ACCEL_REDIRECT_PREFIX is set the
+    transfer is handed to nginx; with USE_X_SENDFILE Flask hands it to the
+    front-end server instead. Otherwise the WSGI server's file wrapper
+    (os.sendfile under gunicorn) streams the file.
+    """
+    try:
+        stat = os.stat(recording.output_file)
+    except (OSError, TypeError):
+        return "Recording file not found", 404
+    
+    filename = os.path.basename(recording.output_file)
+    etag = f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+    
+    accel_prefix = app.config['X_ACCEL_REDIRECT_PREFIX']
+    recordings_root = os.path.abspath(app.config['RECORDINGS_FOLDER'])
+    file_path = os.path.abspath(recording.output_file)
+    if accel_prefix and file_path.startswith(recordings_root + os.sep):
+        # Let nginx transfer the file (it handles ranges itself)
+        response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        relative_path = os.path.relpath(file_path, recordings_root).replace(os.sep, '/')
+        response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{url_quote(relative_path)}"
+        response.headers['Accept-Ranges'] = 'bytes'
+        if as_attachment:
+            response.headers['Content-Disposition'] = f"attachment; filename*=UTF-8''{url_quote(filename)}"
+        response.set_etag(etag)
+        response.last_modified = int(stat.st_mtime)
+        response = response.make_conditional(request)
+        FILE_REQUESTS.inc(method='x-accel', code=response.status_code)
+        if response.status_code == 200:
+            FILE_SERVED_BYTES.inc(stat.st_size, method='x-accel')  # nginx handles ranges, so count whole files
+        return response
+    
+    response = send_file(
+        recording.output_file,
+        as_attachment=as_attachment,
+        download_name=filename,
+        conditional=True,
+        etag=etag,
+        last_modified=stat.st_mtime,
+        max_age=app.config['RECORDING_FILE_MAX_AGE']
+    )
+    response.headers['Accept-Ranges'] = 'bytes'
+    
+    # Bytes of this response: the range for a 206, nothing for a 304
+    method = 'x-sendfile' if app.config['USE_X_SENDFILE'] else 'python'
+    FILE_REQUESTS.inc(method=method, code=response.status_code)
+    if response.status_code in (200, 206):
+        FILE_SERVED_BYTES.inc(response.content_length or 0, method=method)
+    return response
+
 @app.route('/download_recording/<recording_id>')
 def download_recording(recording_id):
     # Find the recording in the database
-    recording = Recording.query.get(recording_id)
+    recording = db.session.get(Recording, recording_id)
     
     if not recording:
         return "Recording not found", 404
     
-    # Check if the file exists
-    if not os.path.exists(recording.output_file):
-        return "Recording file not found", 404
-    
     # Check if the recording is completed
-    if recording.status.lower() not in ['completed']:
+    if recording.status != RecordingStatus.COMPLETED:
         return "Recording is not yet available for download", 400
-        
-    # Get the directory and filename from the output path
-    directory = os.path.dirname(recording.output_file)
-    filename = os.path.basename(recording.output_file)
     
     # Serve the file as an attachment for download
-    return send_file(
-        recording.output_file,
-        as_attachment=True,
-        download_name=filename
-    )
+    return send_recording_file(recording, as_attachment=True)
 
 @app.route('/recording_file/<recording_id>')
 def recording_file(recording_id):
     """Stream a recording file."""
     # Find the recording in the database
-    recording = Recording.query.get(recording_id)
+    recording = db.session.get(Recording, recording_id)
     
     if not recording:
         return "Recording not found", 404
     
-    # Check if the file exists
-    if not os.path.exists(recording.output_file):
-        return "Recording file not found", 404
+    # Send the file for streaming, honouring Range and conditional headers
+    return send_recording_file(recording, as_attachment=False)
+
+@app.route('/recording_status/<recording_id>')
+@login_required
+def recording_status(recording_id):
+    """Live progress of a capture (bytes written, out_time, bitrate), its recent ffmpeg output
+    and the state of its post-processing stages."""
+    recording = db.session.get(Recording, recording_id)
+    if not recording or (not current_user.is_admin and recording.user_id != current_user.id):
+        return {'error': 'Recording not found'}, 404
+    
+    capture = recording_supervisor.get(recording_id)
+    if capture:
+        status = capture.to_dict()
+        status['active'] = True
+    else:
+        status = {'recording_id': recording_id, 'active': False}
     
-    # Send the file for streaming or download
-    return send_file(recording.output_file, as_attachment=False)
+    status['post_processing'] = [task.to_dict() for task in recording.post_processing_tasks]
+    return status
+
+# Events that show up on the timeline as warnings or errors
+TIMELINE_PROBLEM_EVENTS = {'reconnect', 'restart', 'failover', 'retry', 'dispatch_ignored'}
+TIMELINE_ERROR_EVENTS = {'failed', 'refused'}
+
+@app.route('/recording/<recording_id>/timeline')
+@login_required
+def recording_timeline(recording_id):
+    """Timeline of a recording: when each step of its recent runs happened and how long it took."""
+    recording = db.session.get(Recording, recording_id)
+    if not recording or (not current_user.is_admin and recording.user_id != current_user.id):
+        return "Recording not found", 404
+    
+    # Make sure the steps of a capture that just happened are in the table
+    recording_tracer.flush()
+    events = recording.events.order_by(RecordingEvent.at.desc(), RecordingEvent.id.desc()).limit(500).all()
+    events.reverse()
+    
+    # Each dispatch starts a new run (a recurring recording has one per episode);
+    # scheduling that happened before it belongs to the run it set up
+    runs = []
+    for event in events:
+        if not runs or (event.event == 'dispatched' and runs[-1]['dispatched']):
+            runs.append({'events': [], 'dispatched': None})
+        runs[-1]['events'].append(event)
+        if event.event == 'dispatched':
+            runs[-1]['dispatched'] = event
+    
+    for run in runs:
+        # Offsets count from the dispatch, so scheduling days ahead doesn't squash the bars
+        started = (run['dispatched'] or run['events'][0]).at
+        ended = max(event.at + timedelta(seconds=event.duration_seconds or 0) for event in run['events'])
+        span = max((ended - started).total_seconds(), 0.001)
+        run.update(started=started, total_seconds=(ended - started).total_seconds())
+        run['steps'] = [{
+            'event': event,
+            'offset_seconds': (event.at - started).total_seconds(),
+            'left': max((event.at - started).total_seconds(), 0) / span * 100,
+            'width': max((event.duration_seconds or 0) / span * 100, 0.5),
+            'level': 'danger' if event.event in TIMELINE_ERROR_EVENTS else
+                     'warning' if event.event in TIMELINE_PROBLEM_EVENTS else
+                     'info' if event.event in PostProcessor.STAGES else 'primary'
+        } for event in run['events']]
+    
+    return render_template('recording_timeline.html', recording=recording, runs=list(reversed(runs))[:10],
+                           title='Recording Timeline')
 
 @app.route('/list_podcasts')
 def list_podcasts():
@@ -1047,9 +3585,58 @@ def list_podcasts():
     
     return render_template('podcasts.html', title='Available Podcasts', podcasts=list(podcasts.values()))
 
-@app.route('/podcast/<podcast_uuid>')
-def podcast_feed(podcast_uuid):
-    """Generate RSS feed for a specific podcast."""
+class PodcastFeedCache:
+    """Rendered podcast feed pages, keyed by podcast UUID, base URL and page.
+
+    A feed is rendered once and served from memory (optionally gzipped)
+    until one of its episodes completes, is deleted or is pruned, at which
+    point invalidate() drops it. Each invalidation bumps the podcast's
+    generation, so a render that started before it is never cached.
+    """
+
+    def __init__(self):
+        self._feeds = {}  # (podcast_uuid, base_url, page) -> feed entry
+        self._generations = {}  # podcast_uuid -> number of invalidations
+        self._lock = threading.Lock()
+
+    def get(self, podcast_uuid, base_url, page=1):
+        with self._lock:
+            return self._feeds.get((podcast_uuid, base_url, page))
+
+    def generation(self, podcast_uuid):
+        """Read before rendering and hand to put()"""
+        with self._lock:
+            return self._generations.get(podcast_uuid, 0)
+
+    def put(self, podcast_uuid, base_url, page, xml, generation):
+        body = xml.encode('utf-8')
+        entry = {
+            'body': body,
+            'gzip': gzip.compress(body) if app.config['PODCAST_FEED_GZIP'] else None,
+            'etag': hashlib.sha1(body).hexdigest(),
+            'last_modified': int(time.time())
+        }
+        with self._lock:
+            # Invalidated while rendering: serve this render but don't keep it
+            if self._generations.get(podcast_uuid, 0) == generation:
+                self._feeds[(podcast_uuid, base_url, page)] = entry
+        return entry
+
+    def invalidate(self, podcast_uuid):
+        with self._lock:
+            self._generations[podcast_uuid] = self._generations.get(podcast_uuid, 0) + 1
+            for key in [key for key in self._feeds if key[0] == podcast_uuid]:
+                del self._feeds[key]
+
+podcast_feeds = PodcastFeedCache()
+
+def render_podcast_feed(podcast_uuid, base_url, page=1):
+    """Render one page of a podcast's RSS feed.
+
+    Only the latest feed_max_episodes episodes of the podcast are published
+    (all if 0), PODCAST_FEED_PAGE_SIZE per page, newest first. Returns None
+    if the podcast or page doesn't exist.
+    """
     # Find the podcast template (recurring recording with matching UUID)
     podcast_template = Recording.query.filter_by(
         podcast_uuid=podcast_uuid,
@@ -1057,19 +3644,41 @@ def podcast_feed(podcast_uuid):
     ).first()
     
     if not podcast_template:
-        return "Podcast not found", 404
-        
-    # Get completed episodes with this podcast UUID
-    episodes = Recording.query.filter(
-        Recording.status.in_(['Completed', 'completed']),
+        return None
+    
+    episodes_query = Recording.query.filter(
+        Recording.status == RecordingStatus.COMPLETED,
         Recording.podcast_uuid == podcast_uuid
-    ).all()
+    )
+    
+    # Work out the published window and the pages it spans
+    page_size = max(1, app.config['PODCAST_FEED_PAGE_SIZE'])
+    published = episodes_query.count()
+    if podcast_template.feed_max_episodes:
+        published = min(published, podcast_template.feed_max_episodes)
+    last_page = max(1, -(-published // page_size))
+    if page < 1 or page > last_page:
+        return None
+    
+    # Fetch only this page, newest first
+    offset = (page - 1) * page_size
+    episodes = episodes_query.options(db.joinedload(Recording.station)).order_by(
+        Recording.actual_start_time.desc()
+    ).offset(offset).limit(min(page_size, published - offset)).all()
     
     # Convert episodes to dictionaries
     episode_dicts = [episode.to_dict() for episode in episodes]
     
-    # Sort episodes by date, newest first
-    episode_dicts.sort(key=lambda x: x.get('actual_start_time', ''), reverse=True)
+    # RFC 5005 paging links
+    feed_url = f"{base_url}/podcast/{podcast_uuid}"
+    paging = {'self': feed_url if page == 1 else f"{feed_url}?page={page}"}
+    if last_page > 1:
+        paging['first'] = feed_url
+        paging['last'] = f"{feed_url}?page={last_page}"
+        if page > 1:
+            paging['previous'] = feed_url if page == 2 else f"{feed_url}?page={page - 1}"
+        if page < last_page:
+            paging['next'] = f"{feed_url}?page={page + 1}"
     
     # Build the RSS feed
     podcast_info = {
@@ -1084,12 +3693,42 @@ def podcast_feed(podcast_uuid):
         'image': podcast_template.podcast_image
     }
     
-    rss_xml = render_template('podcast_rss.xml',
-                             podcast=podcast_info,
-                             episodes=episode_dicts,
-                             base_url=request.url_root.rstrip('/'))
+    return render_template('podcast_rss.xml',
+                           podcast=podcast_info,
+                           episodes=episode_dicts,
+                           paging=paging,
+                           base_url=base_url)
+
+@app.route('/podcast/<podcast_uuid>')
+def podcast_feed(podcast_uuid):
+    """Serve a page of the RSS feed for a specific podcast from the feed cache."""
+    base_url = request.url_root.rstrip('/')
+    page = request.args.get('page', 1, type=int)
+    
+    feed = podcast_feeds.get(podcast_uuid, base_url, page)
+    FEED_REQUESTS.inc(cache='miss' if feed is None else 'hit')
+    if feed is None:
+        started = time.monotonic()
+        generation = podcast_feeds.generation(podcast_uuid)
+        rss_xml = render_podcast_feed(podcast_uuid, base_url, page)
+        if rss_xml is None:
+            return "Podcast not found", 404
+        FEED_RENDER_SECONDS.observe(time.monotonic() - started)
+        feed = podcast_feeds.put(podcast_uuid, base_url, page, rss_xml, generation)
+    
+    response = Response(mimetype='application/xml')
+    response.vary.add('Accept-Encoding')
+    if feed['gzip'] and 'gzip' in request.accept_encodings:
+        response.set_data(feed['gzip'])
+        response.content_encoding = 'gzip'
+        response.set_etag(feed['etag'] + '-gz')
+    else:
+        response.set_data(feed['body'])
+        response.set_etag(feed['etag'])
+    response.last_modified = feed['last_modified']
     
-    return Response(rss_xml, mimetype='application/xml')
+    # Answers 304 when the client already has this version
+    return response.make_conditional(request)
 
 @app.route('/podcast/image/<podcast_uuid>')
 def podcast_image(podcast_uuid):
@@ -1194,48 +3833,36 @@ def change_password():
     return render_template('change_password.html', title='Change Password', 
                           force_change=force_change, next=next_url)
 
+@app.route('/health/live')
+def liveness_check():
+    """Liveness probe: the process is up and serving requests. Touches neither the database nor the scheduler."""
+    return {'status': 'ok', 'timestamp': datetime.now().isoformat()}, 200
+
 @app.route('/health')
+@app.route('/health/ready')
 def health_check():
-    """Health check endpoint for monitoring."""
+    """Readiness probe for monitoring: database reachable and scheduler running.
+
+    Job figures come from the stats cache, so the job store is never read.
+    """
     try:
         # Test database connectivity
-        db.session.execute('SELECT 1').scalar()
+        db.session.execute(db.text('SELECT 1')).scalar()
         scheduler_status = scheduler.running
         
-        # Get upcoming jobs
-        upcoming_jobs = []
-        for job in scheduler.get_jobs():
-            try:
-                if hasattr(job, 'next_run_time') and job.next_run_time:
-                    next_run = job.next_run_time.isoformat()
-                elif hasattr(job, '_get_run_times'):
-                    try:
-                        next_runs = list(job._get_run_times(datetime.now()))
-                        next_run = next_runs[0].isoformat() if next_runs else None
-                    except:
-                        next_run = None
-                    
-                upcoming_jobs.append({
-                    'id': job.id,
-                    'name': job.name,
-                    'next_run': next_run
-                })
-            except Exception as e:
-                upcoming_jobs.append({
-                    'id': job.id,
-                    'error': str(e)
-                })
-        
         # Get timezone info
-        import time
         system_tz = time.tzname
         
         status = {
-            'status': 'ok',
+            'status': 'ok' if scheduler_status else 'error',
             'timestamp': datetime.now().isoformat(),
             'scheduler_running': scheduler_status,
-            'jobs_count': len(scheduler.get_jobs()),
-            'upcoming_jobs': upcoming_jobs[:5],  # Show the first 5 jobs
+            'jobs_count': stats_cache.jobs_count(),
+            'upcoming_jobs': stats_cache.upcoming_jobs(5),  # Show the next 5 jobs
+            'jobs_executed': stats_cache.jobs_executed,
+            'jobs_failed': stats_cache.jobs_failed,
+            'jobs_missed': stats_cache.jobs_missed,
+            'active_recordings': len(recording_supervisor.active_recordings()),
             'database': 'connected',
             'version': '1.0.8',
             'timezone': {
@@ -1243,14 +3870,44 @@ def health_check():
                 'current_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
         }
-        return status, 200
+        return status, 200 if scheduler_status else 503
     except Exception as e:
         error_status = {
             'status': 'error',
             'timestamp': datetime.now().isoformat(),
             'error': str(e)
         }
-        return error_status, 500
+        return error_status, 503
+
+def post_processing_queue():
+    rows = db.session.query(PostProcessingTask.stage, PostProcessingTask.status, db.func.count()).filter(
+        PostProcessingTask.status != 'done'
+    ).group_by(PostProcessingTask.stage, PostProcessingTask.status).all()
+    return {(stage, status): count for stage, status, count in rows}
+
+metrics.gauge('radio_recorder_scheduler_jobs', 'Jobs in the scheduler', callback=lambda: stats_cache.jobs_count())
+metrics.gauge('radio_recorder_scheduler_jobs_due', 'Jobs past their run time that the scheduler has not submitted yet',
+              callback=lambda: stats_cache.due_jobs_count())
+metrics.counter('radio_recorder_scheduler_job_runs_total', 'Scheduler job runs, by result (executed, error, missed)',
+                ['result'], callback=lambda: {('executed',): stats_cache.jobs_executed,
+                                              ('error',): stats_cache.jobs_failed,
+                                              ('missed',): stats_cache.jobs_missed})
+metrics.gauge('radio_recorder_captures', 'Captures in the recording supervisor, by state (running, queued)',
+              ['state'], callback=lambda: recording_supervisor.capture_counts())
+metrics.gauge('radio_recorder_post_processing_tasks', 'Post-processing tasks not done yet, by stage and status',
+              ['stage', 'status'], callback=post_processing_queue)
+metrics.gauge('radio_recorder_storage_used_bytes', 'Space used by recordings, including reservations of live captures',
+              callback=lambda: storage_manager.usage()[0])
+metrics.gauge('radio_recorder_storage_capacity_bytes', 'Space recordings may use',
+              callback=lambda: storage_manager.usage()[1])
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Counters, gauges and histograms in the Prometheus text format."""
+    token = app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        return "Unauthorized", 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.errorhandler(500)
 def server_error(e):
@@ -1273,18 +3930,27 @@ def admin_dashboard():
         flash('Admin privileges required.', 'danger')
         return redirect(url_for('index'))
     
-    # Get statistics
+    # Get statistics, kept current by the stats cache
+    counts = stats_cache.counts()
     stats = {
-        'stations_count': Station.query.count(),
-        'recordings_count': Recording.query.count(),
-        'completed_recordings': Recording.query.filter(Recording.status.in_(['Completed', 'completed'])).count(),
-        'failed_recordings': Recording.query.filter(Recording.status == 'Failed').count(),
-        'scheduled_jobs': len(scheduler.get_jobs()),
-        'users_count': User.query.count(),
+        'stations_count': counts['stations'],
+        'recordings_count': sum(counts[status] for status in RecordingStatus.ALL),
+        'completed_recordings': counts[RecordingStatus.COMPLETED],
+        'failed_recordings': counts[RecordingStatus.FAILED],
+        'scheduled_jobs': stats_cache.jobs_count(),
+        'users_count': counts['users'],
     }
     
     return render_template('admin_dashboard.html', title='Admin Dashboard', stats=stats)
 
+@app.route('/admin/storage')
+@login_required
+def admin_storage():
+    """Storage usage totals per station, podcast and user, and the watermarks."""
+    if not current_user.is_admin:
+        return {'error': 'Admin privileges required'}, 403
+    return storage_manager.status()
+
 @app.route('/settings', methods=['GET', 'POST'])
 @login_required
 def settings():
@@ -1334,95 +4000,280 @@ def settings():
 def test_nextcloud_connection(nextcloud_url, username, password):
     """Test connection to Nextcloud server"""
     try:
-        import requests
-        # Construct the WebDAV URL
-        webdav_url = f"{nextcloud_url}/remote.php/dav/files/{username}/"
-        
-        # Make a request to list root directory
-        response = requests.request(
-            'PROPFIND',
-            webdav_url,
-            auth=(username, password),
-            headers={'Depth': '0'}
-        )
+        # A throwaway client, so untested credentials never replace the shared one
+        client = WebDAVClient(nextcloud_url, username, password)
+        try:
+            status_code, _ = client.propfind('/')
+        finally:
+            client.session.close()
         
-        if response.status_code == 207:  # Multi-status response is good
+        if status_code == 207:  # Multi-status response is good
             return True, "Connection successful"
         else:
-            return False, f"Unexpected status code: {response.status_code}"
+            return False, f"Unexpected status code: {status_code}"
     
     except Exception as e:
         return False, str(e)
 
-def upload_to_nextcloud(file_path, nextcloud_path, nextcloud_url, username, password):
-    """Upload a file to Nextcloud via WebDAV"""
-    try:
+WEBDAV_NAMESPACES = {'d': 'DAV:', 'oc': 'http://owncloud.org/ns'}
+
+def file_sha1(file_path):
+    """SHA-1 of a file, read in 1 MB blocks"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class WebDAVClient:
+    """Nextcloud WebDAV client for one set of credentials.
+
+    Requests go through one pooled keep-alive session, and directories known
+    to exist are remembered for NEXTCLOUD_DIR_CACHE_TTL seconds, so an upload
+    into an existing folder is a single PUT.
+    """
+
+    MAX_CACHED_DIRECTORIES = 1024
+
+    def __init__(self, nextcloud_url, username, password):
         import requests
-        from pathlib import Path
+        from requests.adapters import HTTPAdapter
         
         # Normalize Nextcloud URL (remove trailing slash if present)
-        if nextcloud_url.endswith('/'):
-            nextcloud_url = nextcloud_url[:-1]
+        self.nextcloud_url = nextcloud_url.rstrip('/')
+        self.username = username
+        self.files_url = f"{self.nextcloud_url}/remote.php/dav/files/{url_quote(username)}"
+        self.uploads_url = f"{self.nextcloud_url}/remote.php/dav/uploads/{url_quote(username)}"
+        
+        self.session = requests.Session()
+        self.session.auth = (username, password)
+        adapter = HTTPAdapter(pool_maxsize=app.config['NEXTCLOUD_UPLOAD_THREADS'] + 2)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        self._known_directories = OrderedDict()  # path -> expiry (monotonic)
+        self._lock = threading.Lock()
+
+    def file_url(self, path):
+        return f"{self.files_url}{url_quote(path)}"
+
+    def propfind(self, path, depth=0, props=('d:getcontentlength',), url=None):
+        """PROPFIND a resource; returns (status_code, {href: {prop: text}})"""
+        body = '<?xml version="1.0"?><d:propfind xmlns:d="DAV:" xmlns:oc="http://owncloud.org/ns"><d:prop>'
+        body += ''.join(f"<{prop}/>" for prop in props)
+        body += '</d:prop></d:propfind>'
+        response = self.session.request('PROPFIND', url or self.file_url(path), data=body,
+                                        headers={'Depth': str(depth), 'Content-Type': 'application/xml'})
+        if response.status_code != 207:
+            return response.status_code, {}
+        
+        resources = {}
+        for item in ET.fromstring(response.content).findall('d:response', WEBDAV_NAMESPACES):
+            href = item.findtext('d:href', default='', namespaces=WEBDAV_NAMESPACES)
+            values = {}
+            for propstat in item.findall('d:propstat', WEBDAV_NAMESPACES):
+                prop_element = propstat.find('d:prop', WEBDAV_NAMESPACES)
+                if prop_element is None or ' 200 ' not in propstat.findtext('d:status', default='', namespaces=WEBDAV_NAMESPACES):
+                    continue
+                for prop in prop_element:
+                    values[prop.tag] = ' '.join(prop.itertext()).strip()
+            resources[href] = values
+        return response.status_code, resources
+
+    def _directory_known(self, path):
+        with self._lock:
+            expiry = self._known_directories.get(path)
+            if expiry is None:
+                return False
+            if expiry < time.monotonic():
+                del self._known_directories[path]
+                return False
+            self._known_directories.move_to_end(path)
+            return True
+
+    def _remember_directory(self, path):
+        with self._lock:
+            self._known_directories[path] = time.monotonic() + app.config['NEXTCLOUD_DIR_CACHE_TTL']
+            self._known_directories.move_to_end(path)
+            while len(self._known_directories) > self.MAX_CACHED_DIRECTORIES:
+                self._known_directories.popitem(last=False)
+
+    def forget_directories(self, path):
+        """Drop a directory and everything below it from the cache"""
+        with self._lock:
+            for known in [known for known in self._known_directories
+                          if known == path or known.startswith(path.rstrip('/') + '/')]:
+                del self._known_directories[known]
+
+    def ensure_directory(self, path):
+        """Create a directory and its parents as needed; returns (success, message)"""
+        path = '/' + path.strip('/')
+        if path == '/' or self._directory_known(path):
+            return True, "Directory exists"
         
+        # MKCOL answers "exists" (405) as well as "created" (201), no PROPFIND needed
+        current_path = ''
+        for part in path.strip('/').split('/'):
+            current_path += f"/{part}"
+            if self._directory_known(current_path):
+                continue
+            
+            app.logger.info(f"Creating directory: {current_path}")
+            response = self.session.request('MKCOL', self.file_url(current_path))
+            if response.status_code not in [201, 405]:  # 201=Created, 405=Already exists
+                return False, f"Failed to create directory {current_path}: {response.status_code}"
+            self._remember_directory(current_path)
+        return True, "Directory created"
+
+    def upload(self, file_path, nextcloud_path):
+        """Upload a file; returns (success, message)"""
         # Ensure the path starts with a slash
         if not nextcloud_path.startswith('/'):
             nextcloud_path = '/' + nextcloud_path
+        directory = os.path.dirname(nextcloud_path)
         
-        # Log the URL for debugging
-        app.logger.info(f"Uploading to Nextcloud URL: {nextcloud_url}/remote.php/dav/files/{username}{nextcloud_path}")
+        app.logger.info(f"Uploading to Nextcloud URL: {self.file_url(nextcloud_path)}")
         
-        # Construct the full URL
-        webdav_url = f"{nextcloud_url}/remote.php/dav/files/{username}{nextcloud_path}"
+        success, message = self.ensure_directory(directory)
+        if not success:
+            return False, message
         
-        # Create directory path recursively if needed
-        dir_path = str(Path(nextcloud_path).parent)
-        if dir_path != '/':
-            # Split the path into components and create each level
-            path_parts = dir_path.strip('/').split('/')
-            current_path = ''
-            
-            for part in path_parts:
-                current_path += f"/{part}"
-                
-                # Check if this directory level exists
-                dir_url = f"{nextcloud_url}/remote.php/dav/files/{username}{current_path}"
-                app.logger.info(f"Checking directory: {dir_url}")
-                
-                head_response = requests.request(
-                    'PROPFIND', 
-                    dir_url,
-                    auth=(username, password),
-                    headers={'Depth': '0'}
-                )
-                
-                # If directory doesn't exist (not 207 Multi-Status), create it
-                if head_response.status_code != 207:
-                    app.logger.info(f"Creating directory: {dir_url}")
-                    mkdir_response = requests.request(
-                        'MKCOL', 
-                        dir_url,
-                        auth=(username, password)
-                    )
-                    app.logger.info(f"Directory creation response: {mkdir_response.status_code}")
-                    
-                    if mkdir_response.status_code not in [201, 405]:  # 201=Created, 405=Already exists
-                        return False, f"Failed to create directory {current_path}: {mkdir_response.status_code}"
+        checksum = file_sha1(file_path)
+        if os.path.getsize(file_path) > app.config['NEXTCLOUD_CHUNK_SIZE']:
+            # Large files go up in chunks that survive a failed attempt
+            success, message = self.upload_chunked(file_path, nextcloud_path, checksum)
+            if not success:
+                return False, message
+            verified, verify_message = self.verify(file_path, nextcloud_path, checksum)
+            return (True, message) if verified else (False, verify_message)
+        
+        status_code = self.put(file_path, nextcloud_path, checksum)
+        if status_code in [404, 409]:
+            # The folder was removed on the server since we cached it
+            self.forget_directories(directory)
+            success, message = self.ensure_directory(directory)
+            if not success:
+                return False, message
+            status_code = self.put(file_path, nextcloud_path, checksum)
+        
+        app.logger.info(f"File upload response: {status_code}")
         
-        # Upload the file
+        if status_code not in [200, 201, 204]:
+            return False, f"Upload failed with status code: {status_code}"
+        
+        verified, verify_message = self.verify(file_path, nextcloud_path, checksum)
+        return (True, "File uploaded successfully") if verified else (False, verify_message)
+
+    def put(self, file_path, nextcloud_path, checksum):
         with open(file_path, 'rb') as f:
-            response = requests.put(
-                webdav_url,
-                data=f,
-                auth=(username, password)
-            )
+            response = self.session.put(self.file_url(nextcloud_path), data=f,
+                                        headers={'OC-Checksum': f"SHA1:{checksum}"})
+        return response.status_code
+
+    def upload_chunked(self, file_path, nextcloud_path, checksum):
+        """Upload a file through the Nextcloud chunking v2 API.
+
+        Chunks go to an upload folder named after the file and its destination,
+        so a retry (even after a restart) finds the chunks already on the server
+        and only sends the missing ones. The server assembles the file when the
+        upload folder's .file is moved to the destination.
+        """
+        chunk_size = app.config['NEXTCLOUD_CHUNK_SIZE']
+        file_stat = os.stat(file_path)
+        total_size = file_stat.st_size
+        chunk_count = (total_size + chunk_size - 1) // chunk_size
         
-        app.logger.info(f"File upload response: {response.status_code}")
+        destination = self.file_url(nextcloud_path)
+        transfer_id = hashlib.sha1(
+            f"{os.path.abspath(file_path)}:{total_size}:{file_stat.st_mtime_ns}:{nextcloud_path}:{chunk_size}".encode()
+        ).hexdigest()
+        upload_url = f"{self.uploads_url}/radio-recorder-{transfer_id}"
+        headers = {'Destination': destination, 'OC-Total-Length': str(total_size)}
         
-        if response.status_code in [200, 201, 204]:
-            return True, "File uploaded successfully"
+        # Chunks acknowledged by an earlier attempt
+        status_code, resources = self.propfind(None, depth=1, url=upload_url)
+        uploaded = set()
+        if status_code == 207:
+            for href, values in resources.items():
+                name = href.rstrip('/').rsplit('/', 1)[-1]
+                if name.isdigit():
+                    number = int(name)
+                    expected = min(chunk_size, total_size - (number - 1) * chunk_size)
+                    if values.get('{DAV:}getcontentlength') == str(expected):
+                        uploaded.add(number)
+            app.logger.info(f"Resuming Nextcloud upload {transfer_id}: {len(uploaded)}/{chunk_count} chunks already uploaded")
         else:
-            return False, f"Upload failed with status code: {response.status_code}"
-    
+            response = self.session.request('MKCOL', upload_url, headers={'Destination': destination})
+            if response.status_code not in [201, 405]:
+                return False, f"Failed to create upload folder: {response.status_code}"
+        
+        def put_chunk(number):
+            with open(file_path, 'rb') as f:
+                f.seek((number - 1) * chunk_size)
+                data = f.read(chunk_size)
+            response = self.session.put(f"{upload_url}/{number:05d}", data=data, headers=headers)
+            if response.status_code not in [200, 201, 204]:
+                raise IOError(f"chunk {number} failed with status code: {response.status_code}")
+            return number
+        
+        missing = [number for number in range(1, chunk_count + 1) if number not in uploaded]
+        with ThreadPoolExecutor(max_workers=app.config['NEXTCLOUD_UPLOAD_THREADS'],
+                                thread_name_prefix='nextcloud-chunk') as executor:
+            for future in [executor.submit(put_chunk, number) for number in missing]:
+                try:
+                    future.result()
+                except Exception as e:
+                    # Chunks that made it stay on the server for the next attempt
+                    return False, f"Chunked upload failed, {str(e)}"
+        
+        # Assemble the chunks into the destination file
+        response = self.session.request('MOVE', f"{upload_url}/.file", headers={
+            **headers, 'OC-Checksum': f"SHA1:{checksum}", 'Overwrite': 'T'
+        })
+        if response.status_code not in [200, 201, 204]:
+            return False, f"Assembling chunks failed with status code: {response.status_code}"
+        
+        return True, f"File uploaded successfully in {chunk_count} chunks ({len(missing)} sent)"
+
+    def verify(self, file_path, nextcloud_path, checksum):
+        """Check the uploaded file's size, and its checksum where the server reports one"""
+        status_code, resources = self.propfind(nextcloud_path, props=('d:getcontentlength', 'oc:checksums'))
+        if status_code != 207 or not resources:
+            return False, f"Uploaded file not found: {status_code}"
+        
+        values = next(iter(resources.values()))
+        remote_size = values.get('{DAV:}getcontentlength')
+        if remote_size is not None and int(remote_size) != os.path.getsize(file_path):
+            return False, f"Size mismatch after upload: {remote_size} bytes on server"
+        
+        remote_checksums = values.get('{http://owncloud.org/ns}checksums', '')
+        for remote_checksum in remote_checksums.split():
+            algorithm, _, value = remote_checksum.partition(':')
+            if algorithm.upper() == 'SHA1' and value.lower() != checksum:
+                return False, f"Checksum mismatch after upload: {remote_checksum}"
+        
+        return True, "Upload verified"
+
+_webdav_clients = {}
+_webdav_clients_lock = threading.Lock()
+
+def webdav_client(nextcloud_url, username, password):
+    """Return the shared WebDAVClient for a set of Nextcloud credentials"""
+    key = (nextcloud_url.rstrip('/'), username, hashlib.sha256(password.encode()).hexdigest())
+    with _webdav_clients_lock:
+        client = _webdav_clients.get(key)
+        if client is None:
+            # Changed credentials replace the user's old client. Its session isn't closed
+            # here since an upload may still be using it; it goes away with the last one.
+            for old_key in [old_key for old_key in _webdav_clients if old_key[:2] == key[:2]]:
+                del _webdav_clients[old_key]
+            client = _webdav_clients[key] = WebDAVClient(nextcloud_url, username, password)
+        return client
+
+def upload_to_nextcloud(file_path, nextcloud_path, nextcloud_url, username, password):
+    """Upload a file to Nextcloud via WebDAV"""
+    try:
+        return webdav_client(nextcloud_url, username, password).upload(file_path, nextcloud_path)
     except Exception as e:
         app.logger.error(f"Exception during Nextcloud upload: {str(e)}")
         return False, str(e)
@@ -1456,56 +4307,207 @@ def test_local_storage_access(folder_path):
         return False, f"Error checking folder: {str(e)}"
 
 # Add this function to your app.py file around line 1550
-def send_pushover_notification(user_id, title, message, url=None, url_title=None):
-    """Send a notification via Pushover API"""
-    try:
-        import requests
+class PushoverDispatcher:
+    """Send Pushover notifications from a background thread.
+
+    Notifications that share a batch_title and go to the same user within
+    PUSHOVER_COALESCE_SECONDS are merged into one message ("5 recordings
+    completed"). All requests share one pooled session. When Pushover's
+    rate-limit headers say the app is out of messages, nothing is sent until
+    the reset: notifications are reported back as deferred (or dropped, when
+    nobody asked for the result) rather than holding up the queue.
+    """
+
+    API_URL = 'https://api.pushover.net/1/messages.json'
+    MAX_MESSAGE_LENGTH = 1024
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, coalesce_seconds):
+        self.coalesce_seconds = coalesce_seconds
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._session = None
+        self._paused_until = {}  # App token -> wall-clock time its rate limit resets
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                
+                self._session = requests.Session()
+                self._session.mount('https://', HTTPAdapter(pool_maxsize=2))
+            return self._session
+
+    def notify(self, api_token, user_key, title, message, url=None, url_title=None,
+               batch_title=None, summary=None, on_sent=None):
+        """Queue a notification; returns straight away.
+
+        Notifications with a batch_title may be merged: the merged message is
+        sent with batch_title (formatted with {count}) and lists the summary
+        of each notification. on_sent is called with (success, message,
+        retry_at) once the notification is delivered or given up on.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='pushover', daemon=True)
+                self._thread.start()
+        
+        self._queue.put({
+            'token': api_token,
+            'user': user_key,
+            'title': title,
+            'message': message,
+            'url': url,
+            'url_title': url_title,
+            'batch_title': batch_title,
+            'summary': summary or title,
+            'callbacks': [on_sent] if on_sent else []
+        })
+        return True, "Notification queued"
+
+    def stop(self, timeout=5):
+        """Send whatever is waiting to be coalesced and stop the thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _run(self):
+        pending = OrderedDict()  # (token, user, batch_title) -> [notifications]
+        deadline = None
         
-        # Get user settings
-        user_settings = UserSettings.query.filter_by(user_id=user_id).first()
-        if not user_settings or not user_settings.pushover_enabled:
-            return False, "Pushover not enabled"
+        while True:
+            timeout = max(0, deadline - time.monotonic()) if pending else None
+            try:
+                notification = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                notification = False
+            
+            if notification:
+                if notification['batch_title'] is None:
+                    self._deliver(notification)
+                    continue
+                if not pending:
+                    deadline = time.monotonic() + self.coalesce_seconds
+                key = (notification['token'], notification['user'], notification['batch_title'])
+                pending.setdefault(key, []).append(notification)
+                continue
+            
+            # The coalescing window closed, or we are stopping
+            for notifications in pending.values():
+                self._deliver(self._coalesce(notifications))
+            pending.clear()
             
-        if not user_settings.pushover_api_token or not user_settings.pushover_user_key:
-            return False, "Pushover credentials missing"
+            if notification is None:
+                return
+
+    def _coalesce(self, notifications):
+        if len(notifications) == 1:
+            return notifications[0]
         
-        # Build the request payload
+        first = notifications[0]
+        message = '\n'.join(notification['summary'] for notification in notifications)
+        if len(message) > self.MAX_MESSAGE_LENGTH:
+            message = message[:self.MAX_MESSAGE_LENGTH - 3] + '...'
+        return dict(first, title=first['batch_title'].format(count=len(notifications)),
+                    message=message, url=None, url_title=None,
+                    callbacks=[callback for notification in notifications for callback in notification['callbacks']])
+
+    def _deliver(self, notification):
+        """Send a notification and report the outcome to whoever queued it."""
+        success, message, retry_at = self._send(notification)
+        for callback in notification['callbacks']:
+            try:
+                callback(success, message, retry_at)
+            except Exception as e:
+                app.logger.exception(f"Error reporting Pushover result: {str(e)}")
+
+    def _send(self, notification):
+        """Returns (success, message, retry_at); retry_at is set when out of messages"""
         payload = {
-            'token': user_settings.pushover_api_token,
-            'user': user_settings.pushover_user_key,
-            'title': title,
-            'message': message,
+            'token': notification['token'],
+            'user': notification['user'],
+            'title': notification['title'],
+            'message': notification['message'],
         }
+        if notification['url']:
+            payload['url'] = notification['url']
+        if notification['url_title']:
+            payload['url_title'] = notification['url_title']
         
-        if url:
-            payload['url'] = url
+        token = notification['token']
+        error = None
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            if self._paused_until.get(token, 0) > time.time():
+                # Out of messages until the reset, which can be weeks away; don't sleep on it
+                # here, every other notification is queued behind this one
+                reset = datetime.fromtimestamp(self._paused_until[token])
+                app.logger.warning(f"Pushover rate limit reached until {reset}, "
+                                   f"not sending '{notification['title']}'")
+                return False, f"Pushover rate limit reached until {reset}", reset
             
-        if url_title:
-            payload['url_title'] = url_title
+            try:
+                response = self.post(payload)
+            except Exception as e:
+                app.logger.error(f"Error sending Pushover notification: {str(e)}")
+                error = str(e)
+                time.sleep(5 * attempt)
+                continue
+            
+            app.logger.info(f"Pushover API response: {response.status_code}")
+            
+            if response.status_code == 200:
+                return True, "Notification sent", None
+            if response.status_code == 429:
+                # Out of messages: the reset comes from the headers
+                if self._paused_until.get(token, 0) <= time.time():
+                    self._paused_until[token] = time.time() + 60
+                continue
+            if 400 <= response.status_code < 500:
+                # Bad token, user key or payload; retrying won't help
+                app.logger.warning(f"Failed to send Pushover notification: {response.text}")
+                return False, f"Pushover rejected the notification: {response.text}", None
+            error = f"Pushover returned HTTP {response.status_code}"
+            time.sleep(5 * attempt)
         
-        # Send the notification
-        response = requests.post(
-            'https://api.pushover.net/1/messages.json',
-            data=payload
-        )
+        app.logger.warning(f"Giving up on Pushover notification '{notification['title']}'")
+        return False, error or "Pushover rate limit reached", None
+
+    def post(self, payload):
+        """POST to the Pushover API through the shared session, tracking the rate limit headers"""
+        response = self.session.post(self.API_URL, data=payload, timeout=30)
         
-        app.logger.info(f"Pushover API response: {response.status_code}")
+        remaining = response.headers.get('X-Limit-App-Remaining')
+        reset = response.headers.get('X-Limit-App-Reset')
+        if reset and reset.isdigit() and (response.status_code == 429 or remaining == '0'):
+            # The limit is per application, other users' tokens can still send
+            self._paused_until[payload['token']] = int(reset)
+        return response
+
+pushover_dispatcher = PushoverDispatcher(app.config['PUSHOVER_COALESCE_SECONDS'])
+
+def send_pushover_notification(user_id, title, message, url=None, url_title=None):
+    """Queue a notification to a user via the Pushover API"""
+    # Get user settings
+    user_settings = UserSettings.query.filter_by(user_id=user_id).first()
+    if not user_settings or not user_settings.pushover_enabled:
+        return False, "Pushover not enabled"
         
-        if response.status_code == 200:
-            return True, "Notification sent successfully"
-        else:
-            return False, f"Failed to send notification: {response.text}"
+    if not user_settings.pushover_api_token or not user_settings.pushover_user_key:
+        return False, "Pushover credentials missing"
     
-    except Exception as e:
-        app.logger.error(f"Error sending Pushover notification: {str(e)}")
-        return False, str(e)
+    return pushover_dispatcher.notify(user_settings.pushover_api_token, user_settings.pushover_user_key,
+                                      title, message, url=url, url_title=url_title)
 
 # Add a function to test Pushover credentials
 def test_pushover_credentials(api_token, user_key):
     """Test Pushover credentials by sending a test notification"""
     try:
-        import requests
-        
         # Build the request payload
         payload = {
             'token': api_token,
@@ -1514,11 +4516,8 @@ def test_pushover_credentials(api_token, user_key):
             'message': 'Your Pushover integration is working correctly!',
         }
         
-        # Send the notification
-        response = requests.post(
-            'https://api.pushover.net/1/messages.json',
-            data=payload
-        )
+        # Send the notification right away, the user is waiting for the result
+        response = pushover_dispatcher.post(payload)
         
         if response.status_code == 200:
             return True, "Test notification sent successfully"
@@ -1528,14 +4527,30 @@ def test_pushover_credentials(api_token, user_key):
     except Exception as e:
         return False, str(e)
 
+def upgrade_database():
+    """Apply pending schema migrations.
+
+    A database that is already current costs a single version lookup.
+    """
+    from alembic.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+    
+    head = ScriptDirectory.from_config(migrate.get_config()).get_current_head()
+    with db.engine.connect() as connection:
+        current = MigrationContext.configure(connection).get_current_revision()
+    
+    if current != head:
+        app.logger.info(f"Upgrading database schema from {current or 'empty'} to {head}")
+        flask_migrate.upgrade()
+
 # Initialize the application
 def init_app():
     import pytz
     from apscheduler.events import EVENT_ALL, EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
     
     with app.app_context():
-        # Create database tables
-        db.create_all()
+        # Create or upgrade the database schema
+        upgrade_database()
         
         # Add a default admin user if there are no users
         if not User.query.first():
@@ -1559,68 +4574,16 @@ def init_app():
             print("Password: password123")
             print("IMPORTANT: Change this password immediately!")
         
-        # Update schema with new column (if using SQLite this should work)
-        inspector = db.inspect(db.engine)
-        if 'password_change_required' not in [c['name'] for c in inspector.get_columns('user')]:
-            db.session.execute('ALTER TABLE user ADD COLUMN password_change_required BOOLEAN DEFAULT FALSE')
-            db.session.commit()
-            
-        # Set password_change_required for any user with default password
-        for user in User.query.all():
-            if check_password_hash(user.password_hash, 'password123'):
-                user.password_change_required = True
-        db.session.commit()
-        
         # Ensure recordings directory exists
         os.makedirs(app.config['RECORDINGS_FOLDER'], exist_ok=True)
         
-        # Add local storage columns to Recording table if they don't exist
-        inspector = db.inspect(db.engine)
-        recording_columns = [c['name'] for c in inspector.get_columns('recording')]
-        
-        new_columns = {
-            'save_to_local': 'BOOLEAN DEFAULT FALSE',
-            'local_folder': 'VARCHAR(255)',
-            'create_folder_structure': 'BOOLEAN DEFAULT TRUE',
-            'local_status': 'VARCHAR(20)',
-            'local_error': 'TEXT',
-            'nextcloud_create_folder_structure': 'BOOLEAN DEFAULT TRUE',
-            'end_time': 'DATETIME',
-            'pushover_enabled': 'BOOLEAN DEFAULT FALSE'
-        }
-        
-        for col_name, col_type in new_columns.items():
-            if col_name not in recording_columns:
-                db.session.execute(text(f'ALTER TABLE recording ADD COLUMN {col_name} {col_type}'))
-        
-        # Add local storage columns to UserSettings table if they don't exist
-        user_settings_columns = [c['name'] for c in inspector.get_columns('user_settings')]
-        
-        new_settings_columns = {
-            'local_storage_enabled': 'BOOLEAN DEFAULT FALSE',
-            'local_storage_path': 'VARCHAR(255)',
-            'create_folder_structure': 'BOOLEAN DEFAULT TRUE',
-            'pushover_api_token': 'VARCHAR(100)',
-            'pushover_user_key': 'VARCHAR(100)',
-            'pushover_enabled': 'BOOLEAN DEFAULT FALSE'
-        }
-        
-        for col_name, col_type in new_settings_columns.items():
-            if col_name not in user_settings_columns:
-                db.session.execute(text(f'ALTER TABLE user_settings ADD COLUMN {col_name} {col_type}'))
-        
-        # Add user_id to Recording table if it doesn't exist
-        if 'user_id' not in recording_columns:
-            db.session.execute(text('ALTER TABLE recording ADD COLUMN user_id INTEGER'))
-            db.session.commit()
-        
-        db.session.commit()
-        
-        # Get all scheduled recordings from the database
+        # Get all scheduled recordings from the database, and every recurring one whatever
+        # its last run did. Re-adding them also replaces jobs stored by older versions.
         now = datetime.now()
-        recordings = Recording.query.filter(
-            Recording.status.in_(['scheduled', 'Scheduled'])
-        ).all()
+        recordings = Recording.query.filter(db.or_(
+            Recording.status == RecordingStatus.SCHEDULED,
+            Recording.recurring.isnot(None)
+        )).all()
         
         for recording in recordings:
             station = Station.query.get(recording.station_id)
@@ -1635,7 +4598,8 @@ def init_app():
                     recording.output_file,
                     recording.start_time,
                     recording.duration_seconds,
-                    recording.recurring
+                    recording.recurring,
+                    recording.pre_roll_seconds
                 )
             elif recording.start_time > now:
                 # Schedule one-time job that hasn't passed yet
@@ -1644,24 +4608,22 @@ def init_app():
                     station.url,
                     recording.output_file,
                     recording.start_time,
-                    recording.duration_seconds
+                    recording.duration_seconds,
+                    pre_roll_seconds=recording.pre_roll_seconds
                 )
-            
-            # Start the scheduler
-            scheduler.start()
         
         # Enhanced logging for scheduler
         def job_executed_listener(event):
-            job = scheduler.get_job(event.job_id)
-            if job:
-                app.logger.info(f"Job executed successfully: {job.name} (ID: {job.id})")
+            name = stats_cache.job_name(event.job_id)
+            if name:
+                app.logger.info(f"Job executed successfully: {name} (ID: {event.job_id})")
             else:
                 app.logger.info(f"Job executed successfully: {event.job_id}")
         
         def job_error_listener(event):
-            job = scheduler.get_job(event.job_id)
-            if job:
-                app.logger.error(f"Job failed: {job.name} (ID: {job.id})")
+            name = stats_cache.job_name(event.job_id)
+            if name:
+                app.logger.error(f"Job failed: {name} (ID: {event.job_id})")
             else:
                 app.logger.error(f"Job failed: {event.job_id}")
             
@@ -1674,13 +4636,22 @@ def init_app():
         # Add listeners for job execution and errors
         scheduler.add_listener(job_executed_listener, EVENT_JOB_EXECUTED)
         scheduler.add_listener(job_error_listener, EVENT_JOB_ERROR)
+        # Mirror the job list and execution counts for /admin and /health
+        scheduler.add_listener(stats_cache.job_event, EVENT_ALL)
         
         # Enhanced logging for starting scheduler
         app.logger.info(f"Starting scheduler with {len(scheduler.get_jobs())} jobs")
         
         if not scheduler.running:
             try:
-                scheduler.start()
+                # Paused until jobs stored by older versions are cleared out. Those ran captures
+                # straight from the scheduler; any still left has no recording to capture.
+                scheduler.start(paused=True)
+                for job in scheduler.get_jobs():
+                    if job.func_ref.endswith(':record_audio'):
+                        app.logger.warning(f"Removing stale recording job {job.id}")
+                        job.remove()
+                scheduler.resume()
                 app.logger.info("Scheduler started successfully")
             except Exception as e:
                 app.logger.error(f"Failed to start scheduler: {e}")
@@ -1707,57 +4678,114 @@ def init_app():
                     app.logger.error(f"Error getting job details: {e}")
         else:
             app.logger.error("Scheduler is NOT running")
+        
+        # Pick up post-processing left over from the previous run
+        post_processor.start()
+        
+        # Storage totals for the watermarks and capture admission
+        storage_manager.refresh()
+        
+        # Counts and the job list behind /admin and /health
+        stats_cache.refresh()
+        
+        # Recover captures a previous run left in progress; live ones are watched by the supervisor
+        check_incomplete_recordings()
     
     # Setup graceful shutdown - ONLY ONCE
     def graceful_shutdown():
-        """Handle graceful shutdown of scheduler."""
+        """Handle graceful shutdown of scheduler and recording supervisor."""
         print("Shutting down scheduler...")
         if scheduler.running:
             scheduler.shutdown()
+        recording_supervisor.shutdown()
+        post_processor.stop()
+        pushover_dispatcher.stop()
+        recording_tracer.flush()
 
     # Register the cleanup function
     import atexit
     atexit.register(graceful_shutdown)
 
-    # Add a scheduled job to check for incomplete recordings every 5 minutes
-    if not scheduler.get_job('check_incomplete_recordings'):
+    # The 5-minute watchdog job of earlier versions is replaced by the recording supervisor
+    if scheduler.get_job('check_incomplete_recordings'):
+        scheduler.remove_job('check_incomplete_recordings')
+
+    # Keep the file index current; the first run indexes an existing archive in the background
+    if not scheduler.get_job('rescan_file_index'):
+        scheduler.add_job(
+            rescan_file_index,
+            'interval',
+            seconds=app.config['FILE_INDEX_RESCAN_SECONDS'],
+            next_run_time=datetime.now(),
+            id='rescan_file_index',
+            name='Rescan File Index'
+        )
+    
+    # Reconcile storage totals and enforce the watermarks every 10 minutes
+    if not scheduler.get_job('check_storage'):
         scheduler.add_job(
-            check_incomplete_recordings,
+            check_storage,
             'interval',
-            minutes=5,
-            id='check_incomplete_recordings',
-            name='Check Incomplete Recordings'
+            minutes=10,
+            id='check_storage',
+            name='Check Storage'
         )
-        app.logger.info("Scheduled watchdog for incomplete recordings")
 
 # 1. Add a watchdog for recordings that checks for incomplete recordings
 def check_incomplete_recordings():
-    """Check for recordings that were interrupted and resume them if needed"""
+    """Crash recovery at start-up: resume or settle recordings a previous run left in progress.
+
+    Live captures are watched by the recording supervisor; this only deals
+    with what was interrupted while the app wasn't running. All changes are
+    committed at once, and resumed captures are dispatched afterwards.
+    """
     with app.app_context():
         try:
             app.logger.info("Running check for incomplete recordings")
             now = datetime.now()
             
             # Find recordings that are in_progress but started more than their duration ago
-            in_progress_recordings = Recording.query.filter_by(status='in_progress').all()
+            in_progress_recordings = Recording.query.filter_by(status=RecordingStatus.IN_PROGRESS).all()
             app.logger.info(f"Found {len(in_progress_recordings)} recordings with 'in_progress' status")
             
             fixed_count = 0
+            completed = []
+            resumes = []  # (recording_id, station_url, output_file, duration_seconds)
             for recording in in_progress_recordings:
                 try:
+                    if recording_supervisor.is_active(recording.id):
+                        continue  # Still being captured by this process
+
                     if not recording.actual_start_time:
                         app.logger.warning(f"Recording {recording.id} has no actual_start_time, marking as failed")
-                        recording.status = 'failed'
-                        recording.error_message = 'Missing start time information'
-                        db.session.commit()
+                        recording.status = RecordingStatus.FAILED
+                        recording.error = 'Missing start time information'
                         continue
                         
-                    expected_end_time = recording.actual_start_time + timedelta(seconds=recording.duration_seconds)
+                    expected_end_time = recording.actual_start_time + timedelta(seconds=recording.capture_seconds)
+                    
+                    # Still inside its slot: pick the capture up again straight away
+                    if now < expected_end_time - timedelta(seconds=30) and recording.station:
+                        if recording.output_file:
+                            finalize_segments(recording.output_file)
+                        captured = (audio_duration(recording.output_file) or 0) \
+                            if recording.output_file and os.path.exists(recording.output_file) else 0
+                        # record_audio subtracts what is already captured, leaving the rest of the slot
+                        remaining = (expected_end_time - now).total_seconds()
+                        app.logger.warning(f"Resuming interrupted recording {recording.id} for the remaining {remaining:.0f}s")
+                        recording.status = RecordingStatus.SCHEDULED
+                        recording.error = None
+                        resumes.append((recording.id, recording.station.url, recording.output_file, int(captured + remaining)))
+                        fixed_count += 1
                     
                     # If expected end time has passed but recording is still in_progress
-                    if now > expected_end_time + timedelta(minutes=2):  # Add 2 minute buffer for processing
+                    elif now > expected_end_time + timedelta(minutes=2):  # Add 2 minute buffer for processing
                         app.logger.warning(f"Found interrupted recording: {recording.id}, expected to end at {expected_end_time}")
                         
+                        # Fold any segments the interrupted capture left behind into the output file
+                        if recording.output_file:
+                            finalize_segments(recording.output_file)
+                        
                         # Check if the output file exists and its size/duration
                         if recording.output_file and os.path.exists(recording.output_file):
                             try:
@@ -1765,22 +4793,13 @@ def check_incomplete_recordings():
                                 file_size = os.path.getsize(recording.output_file)
                                 recording.file_size = file_size
                                 
-                                # Try to get audio duration using ffprobe
-                                audio_duration = 0
-                                try:
-                                    probe_cmd = [
-                                        'ffprobe', 
-                                        '-v', 'error', 
-                                        '-show_entries', 'format=duration', 
-                                        '-of', 'default=noprint_wrappers=1:nokey=1', 
-                                        recording.output_file
-                                    ]
-                                    audio_duration = float(subprocess.check_output(probe_cmd, timeout=15).decode('utf-8').strip())
-                                    app.logger.info(f"File has {audio_duration:.2f} seconds of audio content")
-                                except (subprocess.SubprocessError, ValueError, TimeoutError) as e:
-                                    app.logger.warning(f"Could not determine audio duration: {e}")
-                                except Exception as e:
-                                    app.logger.warning(f"Unexpected error checking audio duration: {str(e)}")
+                                # Measure the audio content (cached while the file is unchanged)
+                                content_duration = audio_duration(recording.output_file) or 0
+                                if content_duration:
+                                    recording.actual_duration_seconds = content_duration
+                                    app.logger.info(f"File has {content_duration:.2f} seconds of audio content")
+                                else:
+                                    app.logger.warning(f"Could not determine audio duration of {recording.output_file}")
                                 
                                 min_content_size = 8192  # At least 8KB to consider non-empty
                                 completion_threshold = 0.80  # 80% of expected duration to consider complete
@@ -1788,11 +4807,11 @@ def check_incomplete_recordings():
                                 # Rule 1: File has significant size
                                 # Rule 2: Duration is at least completion_threshold of expected
                                 if (file_size > min_content_size and 
-                                    (audio_duration > recording.duration_seconds * completion_threshold or 
+                                    (content_duration > recording.duration_seconds * completion_threshold or 
                                      file_size > 1024 * 1024)):  # At least 1MB
                                     
                                     app.logger.info(f"Incomplete recording has sufficient content, marking as completed: {recording.id}")
-                                    recording.status = 'completed'
+                                    recording.status = RecordingStatus.COMPLETED
                                     recording.end_time = expected_end_time
                                     fixed_count += 1
                                 else:
@@ -1800,11 +4819,11 @@ def check_incomplete_recordings():
                                     app.logger.info(f"Incomplete recording needs retry: {recording.id} (size: {file_size} bytes)")
                                     
                                     # Calculate remaining duration
-                                    if audio_duration > 0:
-                                        remaining_duration = max(0, recording.duration_seconds - audio_duration)
+                                    if content_duration > 0:
+                                        remaining_duration = max(0, recording.capture_seconds - content_duration)
                                     else:
                                         elapsed_seconds = (now - recording.actual_start_time).total_seconds()
-                                        remaining_duration = max(0, recording.duration_seconds - elapsed_seconds)
+                                        remaining_duration = max(0, recording.capture_seconds - elapsed_seconds)
                                     
                                     app.logger.info(f"Calculated {remaining_duration:.2f} seconds remaining to record")
                                     
@@ -1821,54 +4840,52 @@ def check_incomplete_recordings():
                                                 else:
                                                     raise ValueError(f"Cannot find station for recording {recording.id}")
                                                     
-                                            # Schedule a new job to complete the recording
-                                            schedule_recording_job(
-                                                recording.id,
-                                                station_url,
-                                                recording.output_file,
-                                                now,  # Start immediately
-                                                remaining_duration
-                                            )
-                                            recording.status = 'scheduled'
+                                            # Complete the recording once the changes are committed;
+                                            # record_audio subtracts what is already captured
+                                            resumes.append((recording.id, station_url, recording.output_file,
+                                                            int(remaining_duration + content_duration)))
+                                            recording.status = RecordingStatus.SCHEDULED
+                                            recording.error = None
                                             app.logger.info(f"Scheduled retry for recording {recording.id}")
                                             fixed_count += 1
                                         except Exception as schedule_err:
                                             app.logger.error(f"Failed to reschedule recording: {schedule_err}")
-                                            recording.status = 'failed'
-                                            recording.error_message = f'Failed to reschedule: {str(schedule_err)}'
+                                            recording.status = RecordingStatus.FAILED
+                                            recording.error = f'Failed to reschedule: {str(schedule_err)}'
                                     else:
                                         # Not enough time left, mark as completed if file has some content
                                         if file_size > min_content_size:
-                                            recording.status = 'completed'
+                                            recording.status = RecordingStatus.COMPLETED
                                             recording.end_time = expected_end_time
                                             app.logger.info(f"Not enough time to retry but has content, marking as completed: {recording.id}")
                                             fixed_count += 1
                                         else:
-                                            recording.status = 'failed'
-                                            recording.error_message = 'Recording interrupted and insufficient content recorded'
+                                            recording.status = RecordingStatus.FAILED
+                                            recording.error = 'Recording interrupted and insufficient content recorded'
                             except Exception as e:
                                 app.logger.error(f"Error checking file for recording {recording.id}: {e}")
-                                recording.status = 'failed'
-                                recording.error_message = f'Error checking file: {str(e)}'
+                                recording.status = RecordingStatus.FAILED
+                                recording.error = f'Error checking file: {str(e)}'
                         else:
                             # File doesn't exist, mark as failed
                             app.logger.warning(f"Output file missing for interrupted recording: {recording.id}")
-                            recording.status = 'failed'
-                            recording.error_message = 'Recording file missing'
+                            recording.status = RecordingStatus.FAILED
+                            recording.error = 'Recording file missing'
                     
-                    db.session.commit()
+                    if recording.status == RecordingStatus.COMPLETED:
+                        completed.append(recording)
                 except Exception as individual_error:
                     app.logger.error(f"Error processing recording {recording.id}: {individual_error}")
-                    # Continue with next recording instead of failing the whole check
-                    try:
-                        db.session.rollback()  # Rollback any partial changes
-                    except Exception as rollback_error:
-                        app.logger.error(f"Error during rollback: {rollback_error}")
+                    # Continue with next recording instead of failing the whole check,
+                    # dropping this one's partial changes
+                    db.session.expire(recording)
             
-            # Also check for recordings that have been in 'scheduled' status for too long
+            # Also check for recordings that have been in 'scheduled' status for too long;
+            # the ones resumed above have no job, they are dispatched below
             stale_scheduled = Recording.query.filter(
-                Recording.status == 'scheduled',
-                Recording.start_time < now - timedelta(hours=2)  # Should have started over 2 hours ago
+                Recording.status == RecordingStatus.SCHEDULED,
+                Recording.start_time < now - timedelta(hours=2),  # Should have started over 2 hours ago
+                Recording.id.notin_([resume[0] for resume in resumes])
             ).all()
             
             for rec in stale_scheduled:
@@ -1877,12 +4894,20 @@ def check_incomplete_recordings():
                     job = scheduler.get_job(rec.id)
                     if not job:
                         app.logger.info(f"No job found for recording {rec.id}, marking as failed")
-                        rec.status = 'failed'
-                        rec.error_message = 'Scheduled job not found'
-                    db.session.commit()
+                        rec.status = RecordingStatus.FAILED
+                        rec.error = 'Scheduled job not found'
                 except Exception as e:
                     app.logger.error(f"Error handling stale scheduled recording: {e}")
             
+            db.session.commit()
+            
+            for recording in completed:
+                storage_manager.recording_completed(recording)
+                if recording.podcast_uuid:
+                    podcast_feeds.invalidate(recording.podcast_uuid)
+            for resume in resumes:
+                dispatch_recording(*resume, resume=True)
+            
             app.logger.info(f"Check complete. Fixed {fixed_count} recordings out of {len(in_progress_recordings)}")
             
         except Exception as e:
@@ -1897,43 +4922,26 @@ def check_incomplete_recordings():
 @login_required
 def find_orphaned_files():
     """Find recording files that exist but aren't in the database"""
-    recordings_folder = app.config['RECORDINGS_FOLDER']
+    # The index is kept current by the captures and the rescan job, only the links need refreshing
+    file_index.reconcile()
     
-    # Get all recording files
-    recording_files = []
-    for root, dirs, files in os.walk(recordings_folder):
-        for file in files:
-            if file.endswith('.mp3'):
-                recording_files.append(os.path.join(root, file))
-    
-    # Get all recordings in the database
-    db_recordings = Recording.query.all()
-    db_files = [r.output_file for r in db_recordings if r.output_file]
-    
-    # Find files not in the database
+    now = datetime.now()
     orphaned_files = []
-    for file_path in recording_files:
-        if file_path not in db_files:
-            # Get file info
-            file_size = os.path.getsize(file_path)
-            file_mtime = datetime.fromtimestamp(os.path.getmtime(file_path))
-            
-            orphaned_files.append({
-                'path': file_path,
-                'filename': os.path.basename(file_path),
-                'size': file_size,
-                'modified': file_mtime,
-                'age_days': (datetime.now() - file_mtime).days
-            })
-    
-    # Sort by modification time (newest first)
-    orphaned_files.sort(key=lambda x: x['modified'], reverse=True)
+    for indexed in file_index.orphaned_files():
+        file_mtime = datetime.fromtimestamp(indexed.mtime)
+        orphaned_files.append({
+            'path': indexed.path,
+            'filename': os.path.basename(indexed.path),
+            'size': indexed.size,
+            'modified': file_mtime,
+            'age_days': (now - file_mtime).days
+        })
     
     return {
         'orphaned_files_count': len(orphaned_files),
         'orphaned_files': orphaned_files,
-        'total_files_count': len(recording_files),
-        'database_files_count': len(db_files)
+        'total_files_count': IndexedFile.query.count(),
+        'database_files_count': Recording.query.filter(Recording.output_file.isnot(None)).count()
     }
 
 if __name__ == '__main__':
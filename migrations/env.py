@@ -0,0 +1,57 @@
+from flask import current_app
+
+from alembic import context
+
+# this is the Alembic Config object, which provides
+# access to the values within the .ini file in use.
+config = context.config
+
+
+def get_engine():
+    return current_app.extensions['migrate'].db.engine
+
+
+config.set_main_option(
+    'sqlalchemy.url',
+    get_engine().url.render_as_string(hide_password=False).replace('%', '%%'))
+target_metadata = current_app.extensions['migrate'].db.metadata
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # The scheduler's job store shares the database but manages its own table
+    return not (type_ == 'table' and name == 'apscheduler_jobs')
+
+
+def run_migrations_offline():
+    """Run migrations in 'offline' mode, emitting SQL without a connection."""
+    url = config.get_main_option('sqlalchemy.url')
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Run migrations in 'online' mode against the application's engine."""
+    with get_engine().connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            render_as_batch=True,  # SQLite can only alter tables in batch mode
+            **current_app.extensions['migrate'].configure_args
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,160 @@
+"""Baseline schema
+
+Creates the schema on a new database. Databases created before migrations
+were introduced are brought up to the same point instead: the columns
+that used to be added by ALTER TABLE probing at every start are added if
+missing, legacy mixed-case statuses are normalised, the Recording indexes
+are created and users still on the default password are flagged.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from werkzeug.security import check_password_hash
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+RECORDING_STATUSES = ('scheduled', 'in_progress', 'completed', 'failed')
+
+RECORDING_INDEXES = {
+    'ix_recording_podcast_status_start': ['podcast_uuid', 'status', 'actual_start_time'],
+    'ix_recording_user_status_end': ['user_id', 'status', 'end_time'],
+    'ix_recording_status_start': ['status', 'start_time'],
+}
+
+
+def user_columns():
+    return [
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('username', sa.String(80), nullable=False, unique=True),
+        sa.Column('password_hash', sa.String(256), nullable=False),
+        sa.Column('is_admin', sa.Boolean()),
+        sa.Column('password_change_required', sa.Boolean(), server_default=sa.false()),
+    ]
+
+
+def user_settings_columns():
+    return [
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id'), nullable=False),
+        sa.Column('nextcloud_url', sa.String(255)),
+        sa.Column('nextcloud_username', sa.String(100)),
+        sa.Column('nextcloud_password', sa.String(255)),
+        sa.Column('local_storage_enabled', sa.Boolean(), server_default=sa.false()),
+        sa.Column('local_storage_path', sa.String(255)),
+        sa.Column('create_folder_structure', sa.Boolean(), server_default=sa.true()),
+        sa.Column('pushover_api_token', sa.String(100)),
+        sa.Column('pushover_user_key', sa.String(100)),
+        sa.Column('pushover_enabled', sa.Boolean(), server_default=sa.false()),
+    ]
+
+
+def station_columns():
+    return [
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(100), nullable=False),
+        sa.Column('url', sa.String(255), nullable=False),
+    ]
+
+
+def recording_columns():
+    return [
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('station_id', sa.Integer(), sa.ForeignKey('station.id'), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id')),
+        sa.Column('start_time', sa.DateTime()),
+        sa.Column('end_time', sa.DateTime()),
+        sa.Column('duration_minutes', sa.Integer(), nullable=False),
+        sa.Column('duration_seconds', sa.Integer(), nullable=False),
+        sa.Column('output_file', sa.String(255)),
+        sa.Column('status', sa.String(20)),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('recurring', sa.String(50)),
+        sa.Column('recurring_type', sa.String(20)),
+        sa.Column('actual_start_time', sa.DateTime()),
+        sa.Column('error', sa.Text()),
+        sa.Column('file_size', sa.Integer()),
+        sa.Column('actual_duration_seconds', sa.Float()),
+        sa.Column('is_podcast', sa.Boolean()),
+        sa.Column('podcast_uuid', sa.String(36)),
+        sa.Column('podcast_title', sa.String(100)),
+        sa.Column('podcast_description', sa.Text()),
+        sa.Column('podcast_language', sa.String(10)),
+        sa.Column('podcast_author', sa.String(100)),
+        sa.Column('podcast_email', sa.String(100)),
+        sa.Column('podcast_category', sa.String(50)),
+        sa.Column('podcast_explicit', sa.String(5)),
+        sa.Column('podcast_image', sa.String(255)),
+        sa.Column('save_to_nextcloud', sa.Boolean()),
+        sa.Column('nextcloud_folder', sa.String(255)),
+        sa.Column('nextcloud_status', sa.String(20)),
+        sa.Column('nextcloud_error', sa.Text()),
+        sa.Column('nextcloud_create_folder_structure', sa.Boolean(), server_default=sa.true()),
+        sa.Column('max_recordings', sa.Integer()),
+        sa.Column('feed_max_episodes', sa.Integer(), server_default='0'),
+        sa.Column('save_to_local', sa.Boolean(), server_default=sa.false()),
+        sa.Column('local_folder', sa.String(255)),
+        sa.Column('create_folder_structure', sa.Boolean(), server_default=sa.true()),
+        sa.Column('local_status', sa.String(20)),
+        sa.Column('local_error', sa.Text()),
+        sa.Column('pushover_enabled', sa.Boolean(), server_default=sa.false()),
+    ]
+
+
+TABLES = [
+    ('user', user_columns),
+    ('user_settings', user_settings_columns),
+    ('station', station_columns),
+    ('recording', recording_columns),
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    for table_name, columns in TABLES:
+        if table_name not in existing_tables:
+            op.create_table(table_name, *columns())
+            continue
+
+        # Pre-migration database: add whatever columns it is missing
+        existing_columns = {c['name'] for c in inspector.get_columns(table_name)}
+        for column in columns():
+            if column.name not in existing_columns:
+                # SQLite can't add constraints to an existing table, so add the bare column
+                op.add_column(table_name, sa.Column(column.name, column.type, server_default=column.server_default))
+
+    # Normalise legacy mixed-case status values so the indexes are usable
+    op.execute("UPDATE recording SET status = lower(status) WHERE status != lower(status)")
+    valid = ', '.join(f"'{status}'" for status in RECORDING_STATUSES)
+    op.execute(f"UPDATE recording SET status = 'failed' WHERE status IS NULL OR status NOT IN ({valid})")
+
+    existing_indexes = {index['name'] for index in inspector.get_indexes('recording')} \
+        if 'recording' in existing_tables else set()
+    for index_name, columns in RECORDING_INDEXES.items():
+        if index_name not in existing_indexes:
+            op.create_index(index_name, 'recording', columns)
+
+    # Flag users still on the default password; this used to run on every start
+    users = sa.table('user', sa.column('id', sa.Integer()), sa.column('password_hash', sa.String()),
+                     sa.column('password_change_required', sa.Boolean()))
+    for user_id, password_hash in bind.execute(sa.select(users.c.id, users.c.password_hash)).all():
+        if password_hash and check_password_hash(password_hash, 'password123'):
+            bind.execute(users.update().where(users.c.id == user_id).values(password_change_required=True))
+
+
+def downgrade():
+    for index_name in RECORDING_INDEXES:
+        op.drop_index(index_name, table_name='recording')
+    for table_name, _ in reversed(TABLES):
+        op.drop_table(table_name)
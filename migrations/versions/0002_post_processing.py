@@ -0,0 +1,45 @@
+"""Post-processing queue
+
+Adds the post_processing_task table that holds the local copy, Nextcloud
+upload, retention and Pushover stages of completed recordings.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 13:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'post_processing_task',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('recording_id', sa.String(36), sa.ForeignKey('recording.id'), nullable=False),
+        sa.Column('stage', sa.String(20), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('started_at', sa.DateTime()),
+        sa.Column('finished_at', sa.DateTime()),
+        sa.Column('duration_seconds', sa.Float()),
+        sa.Column('last_error', sa.Text()),
+    )
+    op.create_index('ix_post_processing_task_recording_id', 'post_processing_task', ['recording_id'])
+    op.create_index('ix_post_processing_task_stage_status_due', 'post_processing_task',
+                    ['stage', 'status', 'next_attempt_at'])
+
+
+def downgrade():
+    op.drop_index('ix_post_processing_task_stage_status_due', table_name='post_processing_task')
+    op.drop_index('ix_post_processing_task_recording_id', table_name='post_processing_task')
+    op.drop_table('post_processing_task')
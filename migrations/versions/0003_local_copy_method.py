@@ -0,0 +1,26 @@
+"""Record how local storage copies were made
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('recording') as batch_op:
+        batch_op.add_column(sa.Column('local_copy_method', sa.String(20)))
+
+
+def downgrade():
+    with op.batch_alter_table('recording') as batch_op:
+        batch_op.drop_column('local_copy_method')
@@ -0,0 +1,28 @@
+"""Age and size based retention limits
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 15:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('recording') as batch_op:
+        batch_op.add_column(sa.Column('max_age_days', sa.Integer(), server_default='0'))
+        batch_op.add_column(sa.Column('max_total_size_mb', sa.Integer(), server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('recording') as batch_op:
+        batch_op.drop_column('max_total_size_mb')
+        batch_op.drop_column('max_age_days')
@@ -0,0 +1,52 @@
+"""File index of RECORDINGS_FOLDER
+
+Adds the indexed_file and indexed_directory tables behind the orphaned
+file report, and an index on recording.output_file to link files to
+their recordings.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 16:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'indexed_file',
+        sa.Column('path', sa.String(1024), primary_key=True),
+        sa.Column('directory', sa.String(1024), nullable=False),
+        sa.Column('size', sa.BigInteger()),
+        sa.Column('mtime', sa.Float()),
+        sa.Column('recording_id', sa.String(36)),
+    )
+    op.create_index('ix_indexed_file_directory', 'indexed_file', ['directory'])
+    op.create_index('ix_indexed_file_recording_id', 'indexed_file', ['recording_id'])
+    
+    op.create_table(
+        'indexed_directory',
+        sa.Column('path', sa.String(1024), primary_key=True),
+        sa.Column('parent', sa.String(1024)),
+        sa.Column('mtime_ns', sa.BigInteger()),
+    )
+    op.create_index('ix_indexed_directory_parent', 'indexed_directory', ['parent'])
+    
+    op.create_index('ix_recording_output_file', 'recording', ['output_file'])
+
+
+def downgrade():
+    op.drop_index('ix_recording_output_file', table_name='recording')
+    op.drop_index('ix_indexed_directory_parent', table_name='indexed_directory')
+    op.drop_table('indexed_directory')
+    op.drop_index('ix_indexed_file_recording_id', table_name='indexed_file')
+    op.drop_index('ix_indexed_file_directory', table_name='indexed_file')
+    op.drop_table('indexed_file')
@@ -0,0 +1,26 @@
+"""Alternate stream URL for stations
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 17:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('station') as batch_op:
+        batch_op.add_column(sa.Column('fallback_url', sa.String(255)))
+
+
+def downgrade():
+    with op.batch_alter_table('station') as batch_op:
+        batch_op.drop_column('fallback_url')
@@ -0,0 +1,23 @@
+"""Index on recording status and end time for the paginated recordings page
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 18:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_recording_status_end', 'recording', ['status', 'end_time', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_recording_status_end', table_name='recording')
@@ -0,0 +1,38 @@
+"""Recording timeline events
+
+Adds the recording_event table behind the per-recording timeline page:
+one row per lifecycle step (scheduled, dispatched, ffmpeg spawned, first
+byte, reconnects, exit, post-processing stages).
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 19:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'recording_event',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('recording_id', sa.String(36), sa.ForeignKey('recording.id'), nullable=False),
+        sa.Column('event', sa.String(30), nullable=False),
+        sa.Column('at', sa.DateTime(), nullable=False),
+        sa.Column('duration_seconds', sa.Float()),
+        sa.Column('detail', sa.String(255)),
+    )
+    op.create_index('ix_recording_event_recording_at', 'recording_event', ['recording_id', 'at'])
+
+
+def downgrade():
+    op.drop_index('ix_recording_event_recording_at', table_name='recording_event')
+    op.drop_table('recording_event')
@@ -0,0 +1,28 @@
+"""Pre-roll and post-roll for recordings
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 21:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('recording') as batch_op:
+        batch_op.add_column(sa.Column('pre_roll_seconds', sa.Integer(), server_default='0'))
+        batch_op.add_column(sa.Column('post_roll_seconds', sa.Integer(), server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('recording') as batch_op:
+        batch_op.drop_column('post_roll_seconds')
+        batch_op.drop_column('pre_roll_seconds')
@@ -0,0 +1,26 @@
+"""File path for post-processing tasks
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 23:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post_processing_task') as batch_op:
+        batch_op.add_column(sa.Column('file_path', sa.String(length=255)))
+
+
+def downgrade():
+    with op.batch_alter_table('post_processing_task') as batch_op:
+        batch_op.drop_column('file_path')